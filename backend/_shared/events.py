@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Tuple
+
+
+TICKET_OPENED = "ticket_opened"
+TICKET_CLOSED = "ticket_closed"
+TICKET_SEVERITY_CHANGED = "ticket_severity_changed"
+DAILY_ACTIVE_USERS = "daily_active_users"
+
+EVENT_TYPES = (TICKET_OPENED, TICKET_CLOSED, TICKET_SEVERITY_CHANGED, DAILY_ACTIVE_USERS)
+
+MAX_EVENTS_PER_REQUEST = 1000
+SPARKLINE_WINDOW = 365  # daily points kept in usage_summaries.sparkline (dashboard uploads allow 365)
+RECENT_TICKETS_CAP = 10  # entries kept in ticket_summaries.recent_tickets
+
+
+def _new_delta() -> Dict[str, Any]:
+    return {
+        "openDelta": 0,
+        "opened": {},  # ticketId -> severity, insertion order = arrival order
+        "closed": set(),
+        "severity": {},  # ticketId -> severity for tickets not opened in this batch
+        "dau": [],
+    }
+
+
+def _ticket_id(ev: Dict[str, Any]) -> str:
+    tid = ev.get("ticketId")
+    if not isinstance(tid, str) or not tid:
+        raise ValueError("INVALID_INPUT: events[].ticketId")
+    return tid
+
+
+def _severity(ev: Dict[str, Any]) -> str:
+    sev = ev.get("severity")
+    if not isinstance(sev, str) or not sev:
+        raise ValueError("INVALID_INPUT: events[].severity")
+    return sev
+
+
+def fold_events(default_customer_id: str, events: Any) -> Dict[str, Dict[str, Any]]:
+    """Group events by customer and fold each group into a single delta.
+
+    Events are applied in arrival order, so an open followed by a close in the
+    same batch cancels out, and a severity change on a ticket opened in the
+    batch is merged into the open itself. Redelivered opens/closes within a
+    batch only move openDelta once; producers must still not resend events
+    across batches (at-least-once delivery needs dedup upstream, since the
+    summary tables do not track per-ticket state).
+    """
+    if not isinstance(events, list) or not events:
+        raise ValueError("INVALID_INPUT: params.events")
+    if len(events) > MAX_EVENTS_PER_REQUEST:
+        raise ValueError(f"INVALID_INPUT: params.events exceeds {MAX_EVENTS_PER_REQUEST}")
+
+    deltas: Dict[str, Dict[str, Any]] = {}
+    for ev in events:
+        if not isinstance(ev, dict):
+            raise ValueError("INVALID_INPUT: events[]")
+        kind = ev.get("type")
+        if kind not in EVENT_TYPES:
+            raise ValueError("INVALID_INPUT: events[].type")
+        customer_id = ev.get("customerId") or default_customer_id
+        if not isinstance(customer_id, str):
+            raise ValueError("INVALID_INPUT: events[].customerId")
+        d = deltas.setdefault(customer_id, _new_delta())
+
+        if kind == TICKET_OPENED:
+            tid = _ticket_id(ev)
+            already_open = tid in d["opened"]
+            d["opened"].pop(tid, None)
+            d["opened"][tid] = _severity(ev)
+            d["severity"].pop(tid, None)
+            d["closed"].discard(tid)
+            if not already_open:
+                d["openDelta"] += 1
+        elif kind == TICKET_CLOSED:
+            tid = _ticket_id(ev)
+            already_closed = tid in d["closed"]
+            d["opened"].pop(tid, None)
+            d["severity"].pop(tid, None)
+            d["closed"].add(tid)
+            if not already_closed:
+                d["openDelta"] -= 1
+        elif kind == TICKET_SEVERITY_CHANGED:
+            tid = _ticket_id(ev)
+            sev = _severity(ev)
+            if tid in d["opened"]:
+                d["opened"][tid] = sev
+            else:
+                d["severity"][tid] = sev
+        else:
+            value = ev.get("value")
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError("INVALID_INPUT: events[].value")
+            d["dau"].append(int(value))
+    return deltas
+
+
+def has_ticket_changes(delta: Dict[str, Any]) -> bool:
+    return bool(delta["openDelta"] or delta["opened"] or delta["closed"] or delta["severity"])
+
+
+def opened_newest_first(delta: Dict[str, Any]) -> List[Dict[str, str]]:
+    items: List[Tuple[str, str]] = list(delta["opened"].items())
+    items.reverse()
+    return [{"id": tid, "severity": sev} for tid, sev in items]
@@ -0,0 +1,167 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_HEALTH_CONFIG: Dict[str, Any] = {
+    "usageWeight": 0.45,
+    "ticketWeight": 0.35,
+    "renewalWeight": 0.20,
+    "usageScores": {"up": 100, "flat": 50, "down": 0},
+    # [maxOpenTickets, score] tiers checked in order; above the last tier -> ticketFloorScore
+    "ticketTiers": [[0, 100], [2, 80], [5, 50]],
+    "ticketFloorScore": 20,
+    "renewalFarDays": 180,
+    "renewalNearDays": 60,
+    "renewalScores": {"far": 100, "mid": 70, "near": 30},
+    "lowRiskMin": 75,
+    "mediumRiskMin": 50,
+}
+
+DEFAULT_DAYS_UNTIL_RENEWAL = 180
+
+_CONFIG_CACHE: Optional[Dict[str, Any]] = None
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _validate(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    for key, default in DEFAULT_HEALTH_CONFIG.items():
+        if isinstance(default, dict):
+            if not isinstance(cfg[key], dict) or any(not _is_number(cfg[key].get(k)) for k in default):
+                raise RuntimeError(f"Invalid health config: {key} needs numeric {', '.join(default)}")
+        elif not isinstance(default, list) and not _is_number(cfg[key]):
+            raise RuntimeError(f"Invalid health config: {key} must be a number")
+    weights = (cfg["usageWeight"], cfg["ticketWeight"], cfg["renewalWeight"])
+    if any(w < 0 for w in weights):
+        raise RuntimeError("Invalid health config: weights must be non-negative numbers")
+    if abs(sum(weights) - 1.0) > 1e-6:
+        raise RuntimeError("Invalid health config: weights must sum to 1")
+    tiers = cfg["ticketTiers"]
+    if (
+        not isinstance(tiers, list)
+        or not tiers
+        or any(not isinstance(t, (list, tuple)) or len(t) != 2 or not all(_is_number(x) for x in t) for t in tiers)
+    ):
+        raise RuntimeError("Invalid health config: ticketTiers must be a non-empty list of [maxOpenTickets, score]")
+    if any(a[0] >= b[0] for a, b in zip(tiers, tiers[1:])):
+        raise RuntimeError("Invalid health config: ticketTiers must be in increasing maxOpenTickets order")
+    if cfg["renewalNearDays"] > cfg["renewalFarDays"]:
+        raise RuntimeError("Invalid health config: renewalNearDays > renewalFarDays")
+    if cfg["mediumRiskMin"] > cfg["lowRiskMin"]:
+        raise RuntimeError("Invalid health config: mediumRiskMin > lowRiskMin")
+    return cfg
+
+
+def merge_health_config(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Overlay overrides on DEFAULT_HEALTH_CONFIG; nested score maps merge key by key."""
+    cfg = dict(DEFAULT_HEALTH_CONFIG)
+    for k, v in (overrides or {}).items():
+        if k not in cfg:
+            continue
+        if isinstance(cfg[k], dict) and isinstance(v, dict):
+            cfg[k] = {**cfg[k], **v}
+        else:
+            cfg[k] = v
+    return _validate(cfg)
+
+
+def load_health_config() -> Dict[str, Any]:
+    """Resolve scoring config from HEALTH_CONFIG_JSON or HEALTH_CONFIG_PATH. Caches result.
+
+    Unset -> DEFAULT_HEALTH_CONFIG. Files are typically written by
+    backtest_health.py --write-config.
+    """
+    global _CONFIG_CACHE
+    if _CONFIG_CACHE:
+        return _CONFIG_CACHE
+
+    raw = os.environ.get("HEALTH_CONFIG_JSON")
+    path = os.environ.get("HEALTH_CONFIG_PATH")
+    if not raw and path:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+    try:
+        overrides = json.loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        raise RuntimeError("Invalid health config: malformed JSON")
+    if not isinstance(overrides, dict):
+        raise RuntimeError("Invalid health config: expected a JSON object")
+    _CONFIG_CACHE = merge_health_config(overrides)
+    return _CONFIG_CACHE
+
+
+def score_from_usage(trend: str, cfg: Dict[str, Any]) -> int:
+    scores = cfg["usageScores"]
+    return scores.get(trend, scores["flat"])
+
+
+def score_from_tickets(open_tickets: int, cfg: Dict[str, Any]) -> int:
+    for max_open, score in cfg["ticketTiers"]:
+        if open_tickets <= max_open:
+            return score
+    return cfg["ticketFloorScore"]
+
+
+def score_from_renewal(days_until: int, cfg: Dict[str, Any]) -> int:
+    scores = cfg["renewalScores"]
+    if days_until > cfg["renewalFarDays"]:
+        return scores["far"]
+    if days_until >= cfg["renewalNearDays"]:
+        return scores["mid"]
+    return scores["near"]
+
+
+def risk_level(score: int, cfg: Dict[str, Any]) -> str:
+    if score >= cfg["lowRiskMin"]:
+        return "low"
+    if score >= cfg["mediumRiskMin"]:
+        return "medium"
+    return "high"
+
+
+def days_until_renewal(renewal_date: Any, now: Optional[datetime] = None) -> int:
+    if not isinstance(renewal_date, str) or not renewal_date:
+        return DEFAULT_DAYS_UNTIL_RENEWAL
+    # Parse ISO8601, tolerate trailing 'Z'
+    rd = renewal_date.replace("Z", "+00:00")
+    try:
+        dt = datetime.fromisoformat(rd)
+        if dt.tzinfo is None:
+            # contracts.renewal_date is a timestamp without time zone, stored as UTC
+            dt = dt.replace(tzinfo=timezone.utc)
+        now = now or datetime.now(timezone.utc)
+        return max(0, (dt - now).days)
+    except Exception:
+        return DEFAULT_DAYS_UNTIL_RENEWAL
+
+
+def _signals(trend: str, open_tickets: int, days_until: int, cfg: Dict[str, Any]) -> List[str]:
+    signals = []
+    signals.append("usage_up" if trend == "up" else ("usage_down" if trend == "down" else "usage_flat"))
+    few_max = cfg["ticketTiers"][1][0] if len(cfg["ticketTiers"]) > 1 else 0
+    if open_tickets == 0:
+        signals.append("no_tickets")
+    elif open_tickets <= few_max:
+        signals.append("few_tickets")
+    else:
+        signals.append("many_tickets")
+    if days_until < cfg["renewalNearDays"]:
+        signals.append("renewal_near")
+    elif days_until > cfg["renewalFarDays"]:
+        signals.append("renewal_far")
+    return signals
+
+
+def score_health(
+    trend: str, open_tickets: int, days_until: int, cfg: Optional[Dict[str, Any]] = None
+) -> Tuple[int, str, List[str]]:
+    cfg = cfg or load_health_config()
+    usage_component = score_from_usage(trend, cfg) * cfg["usageWeight"]
+    ticket_component = score_from_tickets(open_tickets, cfg) * cfg["ticketWeight"]
+    renewal_component = score_from_renewal(days_until, cfg) * cfg["renewalWeight"]
+    score = int(round(usage_component + ticket_component + renewal_component))
+    return score, risk_level(score, cfg), _signals(trend, open_tickets, days_until, cfg)
@@ -0,0 +1,212 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            values = [[list(k), v] for k, v in self._values.items()]
+        return {"help": self.help, "labels": list(self.labelnames), "values": values}
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (+Inf last)..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = [0] * (len(self.buckets) + 1) + [0.0]
+                self._values[labels] = row
+            row[i] += 1
+            row[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            values = [[list(k), list(v)] for k, v in self._values.items()]
+        return {"help": self.help, "labels": list(self.labelnames), "buckets": list(self.buckets), "values": values}
+
+
+class Registry:
+    """In-process metrics. Recording is a dict lookup and a list increment under a lock.
+
+    Multi-process servers point METRICS_DIR (or set_multiprocess_dir) at a shared
+    directory and call start_flusher() in each worker; the worker then dumps
+    its snapshot there every flush interval and render_prometheus() merges
+    every process's file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+        self._dir: Optional[str] = os.environ.get("METRICS_DIR") or None
+        # The flusher thread and /metrics scrapes both flush; one writer at a time
+        self._flush_lock = threading.Lock()
+        self._flush_interval_s = 1.0
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help_text, tuple(labelnames)))
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help_text, tuple(labelnames), buckets))
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = factory()
+                self._metrics[name] = m
+            return m
+
+    def set_multiprocess_dir(self, path: Optional[str]) -> None:
+        self._dir = path
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out: Dict[str, Any] = {"counters": {}, "histograms": {}}
+        for m in metrics:
+            kind = "counters" if isinstance(m, Counter) else "histograms"
+            out[kind][m.name] = m.snapshot()
+        return out
+
+    def flush(self) -> None:
+        """Write this process's snapshot to the multiprocess dir."""
+        if not self._dir:
+            return
+        path = os.path.join(self._dir, f"metrics-{os.getpid()}.json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with self._flush_lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, path)
+
+    def start_flusher(self) -> None:
+        """Flush from a daemon thread every interval (call after fork; threads do not survive it)."""
+        if not self._dir:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self._flush_interval_s)
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+        threading.Thread(target=loop, name="metrics-flusher", daemon=True).start()
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        if not self._dir:
+            return [self.snapshot()]
+        try:
+            self.flush()
+        except OSError:
+            pass  # serve the last published snapshot for this process
+        snaps = []
+        for path in glob.glob(os.path.join(self._dir, "metrics-*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    snaps.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snaps
+
+    def render_prometheus(self) -> str:
+        counters: Dict[str, Dict[str, Any]] = {}
+        histograms: Dict[str, Dict[str, Any]] = {}
+        for snap in self._collect():
+            for name, c in snap.get("counters", {}).items():
+                agg = counters.setdefault(name, {"help": c["help"], "labels": c["labels"], "values": {}})
+                for labels, v in c["values"]:
+                    key = tuple(labels)
+                    agg["values"][key] = agg["values"].get(key, 0.0) + v
+            for name, h in snap.get("histograms", {}).items():
+                agg = histograms.setdefault(
+                    name, {"help": h["help"], "labels": h["labels"], "buckets": h["buckets"], "values": {}}
+                )
+                for labels, row in h["values"]:
+                    key = tuple(labels)
+                    cur = agg["values"].get(key)
+                    agg["values"][key] = list(row) if cur is None else [a + b for a, b in zip(cur, row)]
+
+        lines: List[str] = []
+        for name in sorted(counters):
+            c = counters[name]
+            lines.append(f"# HELP {name} {c['help']}")
+            lines.append(f"# TYPE {name} counter")
+            for key, v in sorted(c["values"].items()):
+                lines.append(f"{name}{_labels(c['labels'], key)} {_num(v)}")
+        for name in sorted(histograms):
+            h = histograms[name]
+            lines.append(f"# HELP {name} {h['help']}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, row in sorted(h["values"].items()):
+                cumulative = 0
+                for bound, count in zip(list(h["buckets"]) + ["+Inf"], row[:-1]):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _num(bound)
+                    lines.append(f"{name}_bucket{_labels(h['labels'], key, ('le', le))} {_num(cumulative)}")
+                lines.append(f"{name}_sum{_labels(h['labels'], key)} {_num(row[-1])}")
+                lines.append(f"{name}_count{_labels(h['labels'], key)} {_num(cumulative)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: List[str], values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+REGISTRY = Registry()
+
+TOOL_REQUESTS = REGISTRY.counter("csc_tool_requests_total", "Tool invocations by status code", ("tool", "status"))
+TOOL_DURATION = REGISTRY.histogram("csc_tool_duration_seconds", "Tool handler latency", ("tool",))
+DB_QUERY_DURATION = REGISTRY.histogram("csc_db_query_duration_seconds", "Database call latency", ("op", "target"))
+DB_ERRORS = REGISTRY.counter("csc_db_errors_total", "Database call failures", ("op", "target"))
+CACHE_REQUESTS = REGISTRY.counter("csc_cache_requests_total", "Cache lookups by result", ("cache", "result"))
+ADMISSION_REJECTIONS = REGISTRY.counter("csc_admission_rejections_total", "Requests rejected before running", ("reason",))
+
+
+def record_tool(tool: str, status_code: int, duration_s: float) -> None:
+    TOOL_REQUESTS.inc((tool, str(status_code)))
+    TOOL_DURATION.observe((tool,), duration_s)
@@ -1,8 +1,8 @@
 import json
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 
-def parse_envelope(raw_body: str) -> Tuple[str, Dict[str, Any]]:
+def parse_envelope(raw_body: str, require_customer: bool = True) -> Tuple[Optional[str], Dict[str, Any]]:
     try:
         body = json.loads(raw_body or "{}")
     except Exception:
@@ -11,9 +11,53 @@ def parse_envelope(raw_body: str) -> Tuple[str, Dict[str, Any]]:
         raise ValueError("INVALID_INPUT")
     customer_id = body.get("customerId")
     params = body.get("params", {})
-    if not isinstance(customer_id, str) or not customer_id:
-        raise ValueError("INVALID_INPUT: customerId")
+    if customer_id is not None or require_customer:
+        if not isinstance(customer_id, str) or not customer_id:
+            raise ValueError("INVALID_INPUT: customerId")
     if not isinstance(params, dict):
         raise ValueError("INVALID_INPUT: params")
     return customer_id, params
 
+
+MAX_BATCH_CUSTOMERS = 5000
+MAX_BUFFERED_BATCH_CUSTOMERS = 500
+
+
+def parse_batch(params: Dict[str, Any], streaming: bool) -> Dict[str, Any]:
+    """Validate params.batch: {"customerIds": [...]}, {"renewalWithinDays": n} or {"all": true}.
+
+    A buffered response (API Gateway) is built in memory and must fit one
+    Lambda payload, so without `streaming` only customerIds batches of up to
+    MAX_BUFFERED_BATCH_CUSTOMERS are accepted; the open-ended modes are left
+    to the response-streaming endpoint (StreamingUrl), which takes up to
+    MAX_BATCH_CUSTOMERS ids.
+    """
+    batch = params.get("batch")
+    if not isinstance(batch, dict):
+        raise ValueError("INVALID_INPUT: params.batch")
+    customer_ids = batch.get("customerIds")
+    within = batch.get("renewalWithinDays")
+    if customer_ids is not None:
+        if (
+            not isinstance(customer_ids, list)
+            or not customer_ids
+            or not all(isinstance(c, str) and c for c in customer_ids)
+        ):
+            raise ValueError("INVALID_INPUT: params.batch.customerIds")
+        limit = MAX_BATCH_CUSTOMERS if streaming else MAX_BUFFERED_BATCH_CUSTOMERS
+        if len(customer_ids) > limit:
+            raise ValueError(f"INVALID_INPUT: params.batch.customerIds exceeds {limit}")
+        return {"customerIds": list(dict.fromkeys(customer_ids)), "renewalWithinDays": None}
+    if not streaming and (within is not None or batch.get("all") is True):
+        raise ValueError(
+            "INVALID_INPUT: params.batch renewalWithinDays/all need the streaming endpoint (StreamingUrl); "
+            "use customerIds here"
+        )
+    if within is not None:
+        if isinstance(within, bool) or not isinstance(within, int) or within <= 0:
+            raise ValueError("INVALID_INPUT: params.batch.renewalWithinDays")
+        return {"customerIds": None, "renewalWithinDays": within}
+    if batch.get("all") is True:
+        return {"customerIds": None, "renewalWithinDays": None}
+    raise ValueError("INVALID_INPUT: params.batch requires customerIds, renewalWithinDays or all")
+
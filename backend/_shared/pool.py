@@ -0,0 +1,140 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class ConnectionPool:
+    """Idle DB-API connections kept per DSN so a warm process reuses them across invocations.
+
+    acquire() hands out an idle connection (or opens one); closing the returned
+    wrapper puts it back. A connection idle longer than `validate_after_s` is
+    checked with `select 1` first and replaced if that fails, which covers
+    server-side idle disconnects while a Lambda sandbox was frozen. Connections
+    that raised one of `fatal_errors`, or that cannot be rolled back out of an
+    open transaction, are closed instead of returned.
+
+    Each handed-out connection belongs to one caller at a time; the pool itself
+    is thread-safe.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[str], Any],
+        fatal_errors: Tuple[type, ...] = (OSError,),
+        max_idle: int = 4,
+        validate_after_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._connect = connect
+        self._fatal_errors = fatal_errors
+        self._max_idle = max_idle
+        self._validate_after_s = validate_after_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._idle: Dict[str, List[Tuple[Any, float]]] = {}
+        self.opened = 0
+        self.reused = 0
+
+    def acquire(self, dsn: str) -> "PooledConnection":
+        while True:
+            with self._lock:
+                idle = self._idle.get(dsn)
+                conn, since = idle.pop() if idle else (None, 0.0)
+            if conn is None:
+                break
+            if self._clock() - since < self._validate_after_s or _alive(conn):
+                with self._lock:
+                    self.reused += 1
+                return PooledConnection(self, dsn, conn)
+            _close_quietly(conn)
+        conn = self._connect(dsn)
+        with self._lock:
+            self.opened += 1
+        return PooledConnection(self, dsn, conn)
+
+    def _release(self, pooled: "PooledConnection") -> None:
+        conn = pooled._conn
+        if not pooled._broken and pooled._in_transaction:
+            try:
+                cur = conn.cursor()
+                try:
+                    cur.execute("rollback")
+                finally:
+                    _close_quietly(cur)
+            except Exception:
+                pooled._broken = True
+        if pooled._broken:
+            _close_quietly(conn)
+            return
+        with self._lock:
+            idle = self._idle.setdefault(pooled._dsn, [])
+            if len(idle) < self._max_idle:
+                idle.append((conn, self._clock()))
+                return
+        _close_quietly(conn)
+
+
+class PooledConnection:
+    """Wraps a pooled connection: close() returns it to the pool, everything else delegates."""
+
+    def __init__(self, pool: ConnectionPool, dsn: str, conn: Any):
+        self._pool = pool
+        self._dsn = dsn
+        self._conn = conn
+        self._broken = False
+        self._in_transaction = False
+        self._released = False
+
+    def cursor(self) -> "_PooledCursor":
+        return _PooledCursor(self, self._conn.cursor())
+
+    def close(self) -> None:
+        if not self._released:
+            self._released = True
+            self._pool._release(self)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class _PooledCursor:
+    def __init__(self, owner: PooledConnection, cur: Any):
+        self._owner = owner
+        self._cur = cur
+
+    def execute(self, sql: str, *args: Any) -> Any:
+        # Connections run in autocommit, so only explicit begin/commit/rollback open or end a transaction
+        verb = sql.lstrip()[:8].lower()
+        if verb.startswith("begin"):
+            self._owner._in_transaction = True
+        try:
+            result = self._cur.execute(sql, *args)
+        except self._owner._pool._fatal_errors:
+            self._owner._broken = True
+            raise
+        if verb.startswith(("commit", "rollback")):
+            self._owner._in_transaction = False
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cur, name)
+
+
+def _alive(conn: Any) -> bool:
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute("select 1")
+            cur.fetchall()
+        finally:
+            _close_quietly(cur)
+        return True
+    except Exception:
+        return False
+
+
+def _close_quietly(obj: Any) -> None:
+    try:
+        obj.close()
+    except Exception:
+        pass
@@ -0,0 +1,107 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ReplicaSet:
+    """Health- and latency-aware selection across read replica DSNs.
+
+    Selection is power-of-two-choices on an EWMA of observed latency among
+    healthy endpoints (unmeasured endpoints count as 0ms so they get probed).
+    After `failure_threshold` consecutive failures an endpoint is skipped for a
+    cooldown that doubles per further failure, up to `max_cooldown_s`; once it
+    expires the endpoint is tried again and one success restores it.
+
+    `connect` takes a DSN and returns a DB-API connection, so tests can pass a
+    fake or point the URLs at local stand-in Postgres instances.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        connect: Callable[[str], Any],
+        failure_threshold: int = 2,
+        base_cooldown_s: float = 5.0,
+        max_cooldown_s: float = 60.0,
+        alpha: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        self._connect = connect
+        self._failure_threshold = failure_threshold
+        self._base_cooldown_s = base_cooldown_s
+        self._max_cooldown_s = max_cooldown_s
+        self._alpha = alpha
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {
+            url: {"ewmaMs": None, "failures": 0, "downUntil": 0.0, "successes": 0, "errors": 0}
+            for url in urls
+        }
+
+    def pick(self, exclude: Tuple[str, ...] = ()) -> Optional[str]:
+        now = self._clock()
+        with self._lock:
+            healthy = [u for u, s in self._state.items() if s["downUntil"] <= now and u not in exclude]
+            if not healthy:
+                return None
+            if len(healthy) == 1:
+                return healthy[0]
+            a, b = self._rng.sample(healthy, 2)
+            la = self._state[a]["ewmaMs"] or 0.0
+            lb = self._state[b]["ewmaMs"] or 0.0
+            return a if la <= lb else b
+
+    def record_success(self, url: str, elapsed_ms: float) -> None:
+        with self._lock:
+            s = self._state[url]
+            prev = s["ewmaMs"]
+            s["ewmaMs"] = elapsed_ms if prev is None else prev + self._alpha * (elapsed_ms - prev)
+            s["failures"] = 0
+            s["downUntil"] = 0.0
+            s["successes"] += 1
+
+    def record_failure(self, url: str) -> None:
+        with self._lock:
+            s = self._state[url]
+            s["failures"] += 1
+            s["errors"] += 1
+            over = s["failures"] - self._failure_threshold
+            if over >= 0:
+                cooldown = min(self._max_cooldown_s, self._base_cooldown_s * (2 ** over))
+                s["downUntil"] = self._clock() + cooldown
+
+    def connect(self) -> Tuple[Optional[str], Any]:
+        """Connect to a healthy replica; (None, None) when every replica is down or fails."""
+        tried: Tuple[str, ...] = ()
+        for _ in range(len(self._state)):
+            url = self.pick(exclude=tried)
+            if url is None:
+                break
+            try:
+                return url, self._connect(url)
+            except Exception:
+                self.record_failure(url)
+                tried += (url,)
+        return None, None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            return [
+                {
+                    "host": _redact(url),
+                    "healthy": s["downUntil"] <= now,
+                    "ewmaMs": None if s["ewmaMs"] is None else round(s["ewmaMs"], 2),
+                    "successes": s["successes"],
+                    "errors": s["errors"],
+                }
+                for url, s in self._state.items()
+            ]
+
+
+def _redact(url: str) -> str:
+    # Never surface credentials in status output
+    return url.rsplit("@", 1)[-1].split("?", 1)[0]
@@ -1,6 +1,6 @@
 import json
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, Optional
 
 
 def _cors_headers() -> Dict[str, str]:
@@ -37,3 +37,26 @@ def error(status_code: int, code: str, message: str) -> Dict[str, Any]:
 def preflight() -> Dict[str, Any]:
     return {"statusCode": 204, "headers": _cors_headers(), "body": ""}
 
+
+
+def ndjson(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Streaming 200 response: one JSON object per line, encoded lazily.
+
+    Servers that can stream (dev_server) write `stream` chunk by chunk; use
+    buffered() where the response must be a single body.
+    """
+    headers = _cors_headers()
+    headers["Content-Type"] = "application/x-ndjson"
+
+    def _lines() -> Iterator[bytes]:
+        for rec in records:
+            yield (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8")
+
+    return {"statusCode": 200, "headers": headers, "stream": _lines()}
+
+
+def buffered(resp: Dict[str, Any]) -> Dict[str, Any]:
+    stream = resp.pop("stream", None)
+    if stream is not None:
+        resp["body"] = b"".join(stream).decode("utf-8")
+    return resp
@@ -0,0 +1,187 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+
+_MAGIC = b"CSCSHM01"
+# magic, slot count, slot size
+_FILE_HEADER = struct.Struct("<8sII")
+# seq (odd while a write is in progress), payload length, key hash, expires-at (epoch seconds)
+_SLOT_HEADER = struct.Struct("<IIQd")
+_SEQ = struct.Struct("<I")
+_SLOT_FIELDS = struct.Struct("<IQd")
+_KEY_LEN = struct.Struct("<H")
+
+PROBE_LIMIT = 4  # slots examined per key (linear probing)
+READ_RETRIES = 3  # re-reads when a concurrent write is detected
+
+
+class SharedCache:
+    """Fixed-slot hash table in an mmap'd file, shared by every process that maps it.
+
+    Each slot is a seqlock: writers bump `seq` to odd, write, and bump it back
+    to even; readers copy the slot without locking and retry if `seq` changed
+    or was odd. Writers serialize per slot with a POSIX record lock (so forked
+    workers exclude each other) plus a thread lock within the process. Keys
+    are (kind, owner, customer); values are JSON and anything that does not
+    fit a slot is simply not cached. Entries expire after their TTL and
+    colliding keys evict the soonest-expiring slot among their probes.
+    """
+
+    def __init__(self, path: str, slots: int = 4096, slot_size: int = 2048, ttl_s: float = 30.0):
+        self.path = path
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = _FILE_HEADER.size + slots * slot_size
+        # Whole-file lock while checking/initialising geometry; first process wins
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, _FILE_HEADER.size, 0)
+            if len(header) == _FILE_HEADER.size and header[:len(_MAGIC)] == _MAGIC:
+                _, file_slots, file_slot_size = _FILE_HEADER.unpack(header)
+                if (file_slots, file_slot_size) != (slots, slot_size):
+                    # Never resize in place: running workers have it mapped and would SIGBUS
+                    os.close(self._fd)
+                    raise RuntimeError(
+                        f"Shared cache {path} has {file_slots} slots of {file_slot_size} bytes, "
+                        f"configured {slots} x {slot_size}; remove the file or match SHM_CACHE_SLOTS/"
+                        "SHM_CACHE_SLOT_BYTES"
+                    )
+            else:
+                # Not initialised yet; the header goes in last so it implies the full size
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _FILE_HEADER.pack(_MAGIC, slots, slot_size), 0)
+        finally:
+            try:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+            except OSError:
+                pass
+        self._mm = mmap.mmap(self._fd, size)
+        self._slots = slots
+        self._slot_size = slot_size
+        self._capacity = slot_size - _SLOT_HEADER.size
+
+    def _offset(self, index: int) -> int:
+        return _FILE_HEADER.size + index * self._slot_size
+
+    @staticmethod
+    def _key(kind: str, owner: str, customer: str) -> Tuple[bytes, int]:
+        key = f"{kind}\x1f{owner}\x1f{customer}".encode("utf-8")
+        h = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+        return key, h
+
+    def _read_slot(self, off: int) -> Optional[Tuple[int, float, bytes]]:
+        mm = self._mm
+        for _ in range(READ_RETRIES):
+            seq, length, h, expires = _SLOT_HEADER.unpack_from(mm, off)
+            if seq & 1:
+                continue
+            if length > self._capacity:
+                return None
+            start = off + _SLOT_HEADER.size
+            payload = mm[start:start + length]
+            if _SLOT_HEADER.unpack_from(mm, off)[0] == seq:
+                return h, expires, payload
+        return None
+
+    def get(self, kind: str, owner: str, customer: str) -> Optional[Any]:
+        key, h = self._key(kind, owner, customer)
+        now = time.time()
+        for i in range(PROBE_LIMIT):
+            slot = self._read_slot(self._offset((h + i) % self._slots))
+            if slot is None or slot[0] != h:
+                continue
+            _, expires, payload = slot
+            if expires <= now:
+                return None
+            (klen,) = _KEY_LEN.unpack_from(payload, 0)
+            if payload[_KEY_LEN.size:_KEY_LEN.size + klen] != key:
+                continue
+            return json.loads(payload[_KEY_LEN.size + klen:])
+        return None
+
+    def _write_slot(self, off: int, h: int, expires: float, payload: bytes) -> None:
+        mm = self._mm
+        odd = _SEQ.unpack_from(mm, off)[0] | 1
+        _SEQ.pack_into(mm, off, odd)
+        mm[off + _SLOT_HEADER.size:off + _SLOT_HEADER.size + len(payload)] = payload
+        _SLOT_FIELDS.pack_into(mm, off + _SEQ.size, len(payload), h, expires)
+        # The even seq is stored last and on its own, so readers never see it with stale fields
+        _SEQ.pack_into(mm, off, (odd + 1) & 0xFFFFFFFF)
+
+    def _choose_slot(self, h: int, now: float) -> int:
+        offsets = [self._offset((h + i) % self._slots) for i in range(PROBE_LIMIT)]
+        headers = [_SLOT_HEADER.unpack_from(self._mm, off) for off in offsets]
+        for off, (_, _, slot_h, _) in zip(offsets, headers):
+            if slot_h == h:
+                return off
+        for off, (_, _, slot_h, expires) in zip(offsets, headers):
+            if slot_h == 0 or expires <= now:
+                return off
+        return min(zip(offsets, headers), key=lambda oh: oh[1][3])[0]
+
+    def put(self, kind: str, owner: str, customer: str, value: Any, ttl_s: Optional[float] = None) -> bool:
+        key, h = self._key(kind, owner, customer)
+        payload = _KEY_LEN.pack(len(key)) + key + json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if len(payload) > self._capacity:
+            return False
+        now = time.time()
+        expires = now + (self.ttl_s if ttl_s is None else ttl_s)
+        with self._lock:
+            off = self._choose_slot(h, now)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self._slot_size, off)
+            try:
+                self._write_slot(off, h, expires, payload)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._slot_size, off)
+        return True
+
+    def invalidate(self, kind: str, owner: str, customer: str) -> None:
+        key, h = self._key(kind, owner, customer)
+        with self._lock:
+            for i in range(PROBE_LIMIT):
+                off = self._offset((h + i) % self._slots)
+                if _SLOT_HEADER.unpack_from(self._mm, off)[2] != h:
+                    continue
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, self._slot_size, off)
+                try:
+                    if _SLOT_HEADER.unpack_from(self._mm, off)[2] == h:
+                        self._write_slot(off, 0, 0.0, b"")
+                finally:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, self._slot_size, off)
+
+
+_SHARED: Optional[SharedCache] = None
+_SHARED_INIT = False
+
+
+def shared_cache() -> Optional[SharedCache]:
+    """Process-wide cache from SHM_CACHE_PATH (e.g. /dev/shm/cs-copilot-cache); None if unset."""
+    global _SHARED, _SHARED_INIT
+    if _SHARED_INIT:
+        return _SHARED
+    path = os.environ.get("SHM_CACHE_PATH")
+    try:
+        if path:
+            _SHARED = SharedCache(
+                path,
+                slots=int(os.environ.get("SHM_CACHE_SLOTS", "4096")),
+                slot_size=int(os.environ.get("SHM_CACHE_SLOT_BYTES", "2048")),
+                ttl_s=float(os.environ.get("SHM_CACHE_TTL_S", "30")),
+            )
+    except (RuntimeError, OSError, ValueError) as e:
+        # A broken or misconfigured cache must not take lookups down with it; run
+        # uncached, and don't retry the open on every lookup
+        print(json.dumps({"type": "CACHE_LOG", "cache": "shm", "error": f"{type(e).__name__}: {e}"}))
+        _SHARED = None
+    finally:
+        _SHARED_INIT = True
+    return _SHARED
@@ -0,0 +1,53 @@
+import os
+import sys
+from array import array
+from typing import Any, Iterable, Optional
+
+
+# usage_summaries.sparkline_packed holds big-endian int32s, the same bytes
+# Postgres int4send() produces, so a trigger can keep the column in sync in SQL.
+_NATIVE_IS_BIG = sys.byteorder == "big"
+_INT32_BYTES = 4
+
+_INT32_MIN = -(2 ** 31)
+_INT32_MAX = 2 ** 31 - 1
+
+# SQL expression packing a jsonb number array `{col}` into sparkline_packed bytes.
+# The dashboard stores fractional values, so each point goes through numeric:
+# rounded half away from zero and clamped to int32, the same as _to_int32 below.
+PACK_JSONB_SQL = (
+    "coalesce((select string_agg(int4send(least(greatest(round(x.v::numeric), -2147483648),"
+    " 2147483647)::int), ''::bytea order by x.ord)"
+    " from jsonb_array_elements({col}) with ordinality as x(v, ord)), ''::bytea)"
+)
+
+
+def packed_reads_enabled() -> bool:
+    """SPARKLINE_PACKED=1 makes reads prefer sparkline_packed over the jsonb column."""
+    return os.environ.get("SPARKLINE_PACKED", "").lower() in ("1", "true", "yes")
+
+
+def _to_int32(v: Any) -> int:
+    n = int(v + 0.5) if v >= 0 else -int(-v + 0.5)
+    return min(max(n, _INT32_MIN), _INT32_MAX)
+
+
+def pack_sparkline(values: Iterable[Any]) -> bytes:
+    a = array("i", (_to_int32(v) for v in values))
+    if not _NATIVE_IS_BIG:
+        a.byteswap()
+    return a.tobytes()
+
+
+def unpack_sparkline(buf: Optional[Any]) -> array:
+    """Decode packed bytes (bytes/memoryview) to array('i') without per-element objects."""
+    a = array("i")
+    if not buf:
+        return a
+    view = memoryview(buf)
+    if len(view) % _INT32_BYTES:
+        raise ValueError("Corrupt sparkline_packed: length not a multiple of 4")
+    a.frombytes(view)
+    if not _NATIVE_IS_BIG:
+        a.byteswap()
+    return a
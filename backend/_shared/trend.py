@@ -0,0 +1,124 @@
+import hashlib
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from _shared.metrics import CACHE_REQUESTS
+
+
+TREND_MIN_RELATIVE_SLOPE = 0.01  # slope / mean per day before a trend is up/down
+MIN_POINTS = 3  # below this the stored label is used as-is
+MK_MIN_POINTS = 10  # Mann-Kendall significance only gates longer series
+MK_ALPHA = 0.05
+
+_CACHE_MAX = 4096
+_CACHE: "OrderedDict[bytes, Optional[Dict[str, Any]]]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()  # dev_server handles requests on threads
+
+
+def _key(values: array) -> bytes:
+    return hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+
+
+def _mann_kendall_p(ys: Sequence[float]) -> float:
+    n = len(ys)
+    s = 0
+    for i in range(n - 1):
+        yi = ys[i]
+        for j in range(i + 1, n):
+            d = ys[j] - yi
+            if d > 0:
+                s += 1
+            elif d < 0:
+                s -= 1
+    ties: Dict[float, int] = {}
+    for y in ys:
+        ties[y] = ties.get(y, 0) + 1
+    var = n * (n - 1) * (2 * n + 5)
+    for t in ties.values():
+        if t > 1:
+            var -= t * (t - 1) * (2 * t + 5)
+    var /= 18.0
+    if var <= 0 or s == 0:
+        return 1.0
+    z = (s - 1 if s > 0 else s + 1) / math.sqrt(var)
+    return math.erfc(abs(z) / math.sqrt(2.0))
+
+
+def _compute(ys: array) -> Optional[Dict[str, Any]]:
+    n = len(ys)
+    if n < MIN_POINTS:
+        return None
+    sum_y = math.fsum(ys)
+    sum_xy = math.fsum(i * y for i, y in enumerate(ys))
+    sum_x = n * (n - 1) / 2.0
+    sum_xx = (n - 1) * n * (2 * n - 1) / 6.0
+    slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x * sum_x)
+    mean = sum_y / n
+    relative = slope / mean if mean > 0 else 0.0
+    p_value = _mann_kendall_p(ys) if n >= MK_MIN_POINTS else None
+
+    trend = "flat"
+    if abs(relative) >= TREND_MIN_RELATIVE_SLOPE and (p_value is None or p_value <= MK_ALPHA):
+        trend = "up" if relative > 0 else "down"
+    return {
+        "trend": trend,
+        "slope": round(slope, 4),
+        "relativeSlope": round(relative, 6),
+        "pValue": None if p_value is None else round(p_value, 6),
+        "points": n,
+    }
+
+
+def analyze_many(series: Iterable[Sequence[Any]]) -> List[Optional[Dict[str, Any]]]:
+    """Trend stats for many sparklines in one pass.
+
+    Identical series (by content hash) are computed once, both within the call
+    and across calls in the same warm process. Series shorter than MIN_POINTS
+    yield None.
+    """
+    out: List[Optional[Dict[str, Any]]] = []
+    hits = misses = 0
+    for values in series:
+        try:
+            ys = array("d", values or ())
+        except TypeError:
+            out.append(None)
+            continue
+        key = _key(ys)
+        with _CACHE_LOCK:
+            cached = key in _CACHE
+            if cached:
+                _CACHE.move_to_end(key)
+                result = _CACHE[key]
+        if cached:
+            out.append(result)
+            hits += 1
+            continue
+        misses += 1
+        result = _compute(ys)
+        with _CACHE_LOCK:
+            _CACHE[key] = result
+            if len(_CACHE) > _CACHE_MAX:
+                _CACHE.popitem(last=False)
+        out.append(result)
+    # One increment per call rather than per series keeps the hot loop clean
+    if hits:
+        CACHE_REQUESTS.inc(("trend", "hit"), hits)
+    if misses:
+        CACHE_REQUESTS.inc(("trend", "miss"), misses)
+    return out
+
+
+def analyze(values: Sequence[Any]) -> Optional[Dict[str, Any]]:
+    return analyze_many((values,))[0]
+
+
+def resolve_trend(usage: Dict[str, Any]) -> str:
+    """Trend label derived from the sparkline, falling back to the stored label."""
+    stats = analyze(usage.get("sparkline") or ())
+    if stats is None:
+        return usage.get("trend", "flat")
+    return stats["trend"]
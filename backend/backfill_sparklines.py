@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Add and backfill usage_summaries.sparkline_packed from the jsonb sparkline.
+
+The packed column holds the same series as big-endian int32s (the bytes
+Postgres int4send() produces). This command is the migration for it: it adds
+the column if needed, installs a trigger that recomputes it whenever any
+writer (ingest_events, dashboard uploads, seeding) sets the jsonb sparkline,
+and then fills existing rows. The work runs in SQL, in batches that each
+commit on their own, so it can be stopped and rerun safely. Until it has
+run, nothing reads or writes the column and ingest_events is unaffected.
+
+Usage:
+  python backfill_sparklines.py [--owner public] [--batch-size 1000]
+  python backfill_sparklines.py --verify-only
+
+After the backfill reports 0 mismatches, set SPARKLINE_PACKED=1 to have tool
+reads decode the packed column instead of parsing jsonb.
+"""
+import argparse
+import sys
+import time
+
+from _shared.db import backfill_sparkline_packed, count_sparkline_packed_mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill usage_summaries.sparkline_packed")
+    parser.add_argument("--owner", help="Only rows for this ownerUserId (default: all owners)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--verify-only", action="store_true", help="Only count rows that are missing or differ")
+    args = parser.parse_args()
+
+    if not args.verify_only:
+        started = time.perf_counter()
+        total = 0
+        for n in backfill_sparkline_packed(args.owner, args.batch_size):
+            total += n
+            print(f"Backfilled {total} rows", file=sys.stderr)
+        print(f"Backfill done: {total} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    mismatches = count_sparkline_packed_mismatches(args.owner)
+    print(f"Mismatched or missing sparkline_packed rows: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Offline backtest and sensitivity analysis for calculate_health weights/thresholds.
+
+Snapshots are JSON lines, one row per (snapshot, customer):
+  {"snapshotDate": "2025-01-01", "customerId": "acme-001", "trend": "up",
+   "sparkline": [77, 81, 85, 89], "openTickets": 2,
+   "renewalDate": "2025-03-01T00:00:00+00:00", "churned": false}
+
+`churned` is the observed outcome (true/false); rows without it still count
+towards the risk-level distribution but not towards churn accuracy.
+
+Usage:
+  # Capture today's summary tables for an owner (fill in `churned` later)
+  python backtest_health.py export --owner public --out snapshots/2025-01-01.jsonl
+
+  # Evaluate the grid and persist the best configuration
+  python backtest_health.py run snapshots/*.jsonl --top 10 --write-config health_config.json
+
+Deploy the chosen file with HEALTH_CONFIG_PATH (or inline via HEALTH_CONFIG_JSON);
+calculate_health picks it up without a code change.
+"""
+import argparse
+import json
+import sys
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+from _shared.health import (
+    days_until_renewal,
+    load_health_config,
+    score_from_renewal,
+    score_from_tickets,
+    score_from_usage,
+)
+from _shared.trend import analyze_many
+
+
+# (trend, openTickets, daysUntil) -> [rows, labeled, churned]
+Groups = Dict[Tuple[str, int, int], List[int]]
+# (usageScore, ticketScore, renewalScore) -> [rows, labeled, churned]
+Cells = Dict[Tuple[int, int, int], List[int]]
+
+
+def _parse_snapshot_date(value: Any) -> datetime:
+    if isinstance(value, str) and value:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc)
+
+
+def load_groups(paths: Iterable[str]) -> Groups:
+    """Collapse snapshot rows to distinct (trend, openTickets, daysUntil) groups."""
+    rows: List[Dict[str, Any]] = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    rows.append(json.loads(line))
+
+    stats = analyze_many(r.get("sparkline") or () for r in rows)
+    groups: Groups = {}
+    for row, st in zip(rows, stats):
+        trend = st["trend"] if st else (row.get("trend") or "flat")
+        open_tickets = int(row.get("openTickets") or 0)
+        if "daysUntilRenewal" in row:
+            days = int(row["daysUntilRenewal"])
+        else:
+            days = days_until_renewal(row.get("renewalDate"), _parse_snapshot_date(row.get("snapshotDate")))
+        g = groups.setdefault((trend, open_tickets, days), [0, 0, 0])
+        g[0] += 1
+        churned = row.get("churned")
+        if isinstance(churned, bool):
+            g[1] += 1
+            g[2] += int(churned)
+    return groups
+
+
+def _cells(groups: Groups, cfg: Dict[str, Any]) -> Cells:
+    cells: Cells = {}
+    for (trend, open_tickets, days), (n, labeled, churned) in groups.items():
+        key = (
+            score_from_usage(trend, cfg),
+            score_from_tickets(open_tickets, cfg),
+            score_from_renewal(days, cfg),
+        )
+        c = cells.setdefault(key, [0, 0, 0])
+        c[0] += n
+        c[1] += labeled
+        c[2] += churned
+    return cells
+
+
+def _score_table(cells: Cells, weights: Tuple[float, float, float]):
+    """Aggregate cells by final score; return sorted scores plus prefix sums."""
+    wu, wt, wr = weights
+    by_score: Dict[int, List[int]] = {}
+    for (u, t, r), (n, labeled, churned) in cells.items():
+        s = int(round(u * wu + t * wt + r * wr))
+        b = by_score.setdefault(s, [0, 0, 0])
+        b[0] += n
+        b[1] += labeled
+        b[2] += churned
+    scores = sorted(by_score)
+    pn, pl, pc = [0], [0], [0]
+    for s in scores:
+        n, labeled, churned = by_score[s]
+        pn.append(pn[-1] + n)
+        pl.append(pl[-1] + labeled)
+        pc.append(pc[-1] + churned)
+    return scores, pn, pl, pc
+
+
+def _metrics(table, low_min: int, medium_min: int) -> Dict[str, Any]:
+    scores, pn, pl, pc = table
+    hi = bisect_left(scores, medium_min)  # scores < medium_min -> high risk
+    mid = bisect_left(scores, low_min)
+    total, labeled, churned = pn[-1], pl[-1], pc[-1]
+    high_n = pn[hi]
+    medium_n = pn[mid] - pn[hi]
+    low_n = total - pn[mid]
+
+    # Predict churn for high-risk accounts
+    tp = pc[hi]
+    fp = pl[hi] - tp
+    fn = churned - tp
+    tn = labeled - tp - fp - fn
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "distribution": {
+            "low": round(low_n / total, 4) if total else 0.0,
+            "medium": round(medium_n / total, 4) if total else 0.0,
+            "high": round(high_n / total, 4) if total else 0.0,
+        },
+        "accuracy": round((tp + tn) / labeled, 4) if labeled else None,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+    }
+
+
+def _weight_grid(step: float) -> List[Tuple[float, float, float]]:
+    n = int(round(1 / step))
+    out = []
+    for i in range(n + 1):
+        for j in range(n + 1 - i):
+            out.append((round(i * step, 4), round(j * step, 4), round((n - i - j) * step, 4)))
+    return out
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def evaluate(groups: Groups, cfg: Dict[str, Any]) -> Dict[str, Any]:
+    table = _score_table(_cells(groups, cfg), (cfg["usageWeight"], cfg["ticketWeight"], cfg["renewalWeight"]))
+    return _metrics(table, cfg["lowRiskMin"], cfg["mediumRiskMin"])
+
+
+def run_grid(groups: Groups, base: Dict[str, Any], args) -> Tuple[List[Dict[str, Any]], int]:
+    weights = _weight_grid(args.weight_step)
+    far_days, near_days = _int_list(args.far_days), _int_list(args.near_days)
+    low_mins, medium_mins = _int_list(args.low_min), _int_list(args.medium_min)
+
+    results: List[Dict[str, Any]] = []
+    evaluated = 0
+    for far in far_days:
+        for near in near_days:
+            if near > far:
+                continue
+            cells = _cells(groups, {**base, "renewalFarDays": far, "renewalNearDays": near})
+            for w in weights:
+                table = _score_table(cells, w)
+                for low_min in low_mins:
+                    for medium_min in medium_mins:
+                        if medium_min > low_min:
+                            continue
+                        evaluated += 1
+                        m = _metrics(table, low_min, medium_min)
+                        results.append({
+                            "config": {
+                                "usageWeight": w[0],
+                                "ticketWeight": w[1],
+                                "renewalWeight": w[2],
+                                "renewalFarDays": far,
+                                "renewalNearDays": near,
+                                "lowRiskMin": low_min,
+                                "mediumRiskMin": medium_min,
+                            },
+                            **m,
+                        })
+
+    def _rank(r):
+        return -(r[args.objective] or 0.0), _distance(r["config"], base)
+
+    results.sort(key=_rank)
+    return results, evaluated
+
+
+def _distance(cfg: Dict[str, Any], base: Dict[str, Any]) -> float:
+    # Prefer configurations close to the current one when objectives tie
+    return (
+        abs(cfg["usageWeight"] - base["usageWeight"])
+        + abs(cfg["ticketWeight"] - base["ticketWeight"])
+        + abs(cfg["renewalWeight"] - base["renewalWeight"])
+        + abs(cfg["renewalFarDays"] - base["renewalFarDays"]) / 100.0
+        + abs(cfg["renewalNearDays"] - base["renewalNearDays"]) / 100.0
+        + abs(cfg["lowRiskMin"] - base["lowRiskMin"]) / 100.0
+        + abs(cfg["mediumRiskMin"] - base["mediumRiskMin"]) / 100.0
+    )
+
+
+def cmd_export(args) -> None:
+    from _shared.db import iter_owner_summaries
+
+    snapshot_date = args.date or datetime.now(timezone.utc).date().isoformat()
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        n = 0
+        for row in iter_owner_summaries(args.owner):
+            out.write(json.dumps({
+                "snapshotDate": snapshot_date,
+                "customerId": row["customerId"],
+                "trend": row["trend"],
+                "sparkline": list(row["sparkline"]),
+                "openTickets": row["openTickets"],
+                "renewalDate": row["renewalDate"],
+                "churned": None,
+            }) + "\n")
+            n += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Exported {n} rows for owner={args.owner}", file=sys.stderr)
+
+
+def cmd_run(args) -> None:
+    base = load_health_config()
+    groups = load_groups(args.snapshots)
+    if not groups:
+        raise SystemExit("No snapshot rows found")
+
+    started = time.perf_counter()
+    results, evaluated = run_grid(groups, base, args)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "rows": sum(g[0] for g in groups.values()),
+        "groups": len(groups),
+        "configurations": evaluated,
+        "elapsedSeconds": round(elapsed, 3),
+        "objective": args.objective,
+        "baseline": evaluate(groups, base),
+        "top": results[: args.top],
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.write_config and results:
+        with open(args.write_config, "w", encoding="utf-8") as f:
+            json.dump(results[0]["config"], f, indent=2)
+            f.write("\n")
+        print(f"Wrote {args.write_config}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest calculate_health weights and thresholds")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="Write current summary tables as a JSONL snapshot")
+    p_export.add_argument("--owner", default="public")
+    p_export.add_argument("--date", help="snapshotDate to record (default: today, UTC)")
+    p_export.add_argument("--out", help="Output file (default: stdout)")
+    p_export.set_defaults(func=cmd_export)
+
+    p_run = sub.add_parser("run", help="Evaluate a weight/threshold grid over JSONL snapshots")
+    p_run.add_argument("snapshots", nargs="+")
+    p_run.add_argument("--weight-step", type=float, default=0.05)
+    p_run.add_argument("--far-days", default="120,150,180,210,240")
+    p_run.add_argument("--near-days", default="30,45,60,90")
+    p_run.add_argument("--low-min", default="60,65,70,75,80,85")
+    p_run.add_argument("--medium-min", default="35,40,45,50,55,60")
+    p_run.add_argument("--objective", choices=["f1", "accuracy", "precision", "recall"], default="f1")
+    p_run.add_argument("--top", type=int, default=10)
+    p_run.add_argument("--write-config", help="Write the best configuration as JSON (for HEALTH_CONFIG_PATH)")
+    p_run.set_defaults(func=cmd_run)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
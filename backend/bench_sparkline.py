@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Compare the jsonb and packed int32 sparkline encodings for year-long daily series.
+
+Offline: rows are synthesized in the form pg8000 receives them. The driver
+reads results in text format, so jsonb arrives as "[1, 2, ...]" text and
+bytea arrives hex-encoded ("\\x0000..."), twice its raw size; decoding the
+packed column therefore includes the driver's bytes.fromhex step. For each
+encoding it reports the bytes per row on the wire, the decode time, and the
+time to decode and re-encode the series as a JSON response. The raw packed
+size (what a binary-format fetch would carry) and a zigzag delta-varint size
+are shown for reference.
+
+Usage:
+  python bench_sparkline.py [--rows 2000] [--days 365] [--repeat 5]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, List
+
+from _shared.sparkline import pack_sparkline, unpack_sparkline
+
+
+def _series(rng: random.Random, days: int) -> List[int]:
+    level = rng.randint(20, 2000)
+    drift = rng.uniform(-0.5, 0.5)
+    out = []
+    for d in range(days):
+        weekday_dip = 0.6 if d % 7 in (5, 6) else 1.0
+        out.append(max(0, int((level + drift * d) * weekday_dip + rng.gauss(0, level * 0.05))))
+    return out
+
+
+def _varint_size(values: List[int]) -> int:
+    size, prev = 0, 0
+    for v in values:
+        delta = v - prev
+        prev = v
+        z = (delta << 1) ^ (delta >> 63)
+        size += 1
+        while z >= 0x80:
+            z >>= 7
+            size += 1
+    return size
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jsonb vs packed sparkline decoding")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    series = [_series(rng, args.days) for _ in range(args.rows)]
+    # Postgres renders jsonb arrays as "[1, 2, 3]" and bytea as "\x<hex>"
+    jsonb_rows = [json.dumps(s) for s in series]
+    raw_packed = [pack_sparkline(s) for s in series]
+    packed_rows = ["\\x" + p.hex() for p in raw_packed]
+    assert all(unpack_sparkline(bytes.fromhex(t[2:])).tolist() == s for t, s in zip(packed_rows, series))
+
+    def decode_jsonb():
+        return [json.loads(t) for t in jsonb_rows]
+
+    def decode_packed():
+        # pg8000's bytea text parser, then our decode
+        return [unpack_sparkline(bytes.fromhex(t[2:])) for t in packed_rows]
+
+    def respond_jsonb():
+        return [json.dumps(json.loads(t)) for t in jsonb_rows]
+
+    def respond_packed():
+        return [json.dumps(unpack_sparkline(bytes.fromhex(t[2:])).tolist()) for t in packed_rows]
+
+    report = {"rows": args.rows, "days": args.days, "encodings": {}}
+    for name, rows, decode, respond in (
+        ("jsonb", jsonb_rows, decode_jsonb, respond_jsonb),
+        ("packed_int32", packed_rows, decode_packed, respond_packed),
+    ):
+        size = sum(len(r) for r in rows)
+        decode_s = _best(decode, args.repeat)
+        respond_s = _best(respond, args.repeat)
+        report["encodings"][name] = {
+            "bytesPerRow": round(size / args.rows, 1),
+            "decodeUsPerRow": round(decode_s / args.rows * 1e6, 2),
+            "decodeAndJsonUsPerRow": round(respond_s / args.rows * 1e6, 2),
+        }
+    report["encodings"]["packed_int32_binary"] = {
+        "bytesPerRow": round(sum(len(p) for p in raw_packed) / args.rows, 1),
+    }
+    report["encodings"]["delta_varint"] = {
+        "bytesPerRow": round(sum(_varint_size(s) for s in series) / args.rows, 1),
+    }
+    jsonb, packed = report["encodings"]["jsonb"], report["encodings"]["packed_int32"]
+    report["decodeSpeedup"] = round(jsonb["decodeUsPerRow"] / packed["decodeUsPerRow"], 1)
+    report["sizeRatio"] = round(packed["bytesPerRow"] / jsonb["bytesPerRow"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,46 @@ Usage:
   python backend/dev_server.py --port 8787
 
 Then set frontend BACKEND_BASE_URL=http://127.0.0.1:8787
+
+Overload protection (flags or DEV_* env vars):
+  --max-concurrency / DEV_MAX_CONCURRENCY   handlers running at once (default 8)
+  --max-queue / DEV_MAX_QUEUE               requests allowed to wait for a slot (default 32)
+  --queue-timeout-ms / DEV_QUEUE_TIMEOUT_MS wait budget before a queued request is shed (default 2000)
+  --rate / DEV_CLIENT_RATE                  per-client tokens per second, 0 disables (default 20)
+  --burst / DEV_CLIENT_BURST                per-client bucket size (default 40)
+Saturation and shedding return 503 and rate limiting returns 429, both with
+Retry-After.
+
+Status endpoints (off by default; they are unauthenticated):
+  --status-endpoints / DEV_STATUS_ENDPOINTS=1  enable GET /admission (live
+  admission counters) and GET /metrics (request, latency, DB and cache
+  metrics in Prometheus text format)
+
+Workers:
+  --workers / DEV_WORKERS      pre-forked worker processes sharing the port (default 1)
+  --metrics-dir / METRICS_DIR  where workers publish metric snapshots (default: a temp dir)
+With several workers each process writes its snapshot once a second and
+/metrics sums them, so a scrape may trail the last second of traffic.
+Admission and rate limits apply per worker. Set SHM_CACHE_PATH (see
+.env.example) so workers share one customer lookup cache instead of each
+refetching the same rows.
 """
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import json
 import argparse
-from typing import Dict
+import math
+import glob
+import os
+import signal
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from _shared.hmac_auth import verify_headers
+from _shared.metrics import ADMISSION_REJECTIONS, REGISTRY, record_tool
+from _shared.responses import error
 
 TOOLS = {
     "get_customer_usage": "tools.get_customer_usage.handler",
@@ -22,22 +57,172 @@ TOOLS = {
     "calculate_health": "tools.calculate_health.handler",
     "generate_email": "tools.generate_email.handler",
     "generate_qbr_outline": "tools.generate_qbr_outline.handler",
+    "ingest_events": "tools.ingest_events.handler",
+    "get_upcoming_renewals": "tools.get_upcoming_renewals.handler",
+    "rank_at_risk_accounts": "tools.rank_at_risk_accounts.handler",
 }
 
 
 def load_handler(module_path: str):
     mod = __import__(module_path, fromlist=["handler"])
-    return getattr(mod, "handler")
+    # Tools with NDJSON batch modes expose stream_handler, which leaves the body lazy
+    return getattr(mod, "stream_handler", None) or getattr(mod, "handler")
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded wait queue.
+
+    A request runs immediately if a slot is free, waits (up to queue_timeout_s)
+    if fewer than max_queue requests are already waiting, and is rejected at
+    once otherwise, so latency stays bounded instead of growing with the
+    backlog.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout_s: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.shed_deadline = 0
+
+    def acquire(self) -> Optional[str]:
+        """None when admitted (caller must release()), else the rejection reason."""
+        with self._cond:
+            if self.active < self.max_concurrency:
+                self.active += 1
+                self.admitted += 1
+                return None
+            if self.waiting >= self.max_queue:
+                self.rejected_full += 1
+                return "queue_full"
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout_s
+            try:
+                while self.active >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed_deadline += 1
+                        return "deadline"
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+            return None
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def retry_after_s(self) -> int:
+        return max(1, math.ceil(self.queue_timeout_s))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejectedQueueFull": self.rejected_full,
+                "shedDeadline": self.shed_deadline,
+                "maxConcurrency": self.max_concurrency,
+                "maxQueue": self.max_queue,
+                "queueTimeoutMs": int(self.queue_timeout_s * 1000),
+            }
+
+
+class ClientRateLimiter:
+    """Token bucket per client id; least recently seen buckets are evicted past max_clients."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.limited = 0
+
+    def allow(self, client: str) -> Tuple[bool, int]:
+        """(allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = [self.burst, now]
+                self._buckets[client] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return True, 0
+            self.limited += 1
+            return False, max(1, math.ceil((1.0 - bucket[0]) / self.rate))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"rate": self.rate, "burst": self.burst, "clients": len(self._buckets), "limited": self.limited}
+
+
+def _verified_client(headers: Dict[str, str], raw: str) -> str:
+    # Only a verified X-Client gets its own bucket; unsigned or forged requests
+    # share one, so rotating X-Client values cannot dodge the limit.
+    try:
+        client, _ = verify_headers(headers, raw)
+        return client
+    except Exception:
+        return "<unverified>"
 
 
 class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 for chunked NDJSON streaming; every other response sets Content-Length
+    protocol_version = "HTTP/1.1"
+
+    # Set by main(); None disables the corresponding protection
+    admission: Optional[AdmissionController] = None
+    limiter: Optional[ClientRateLimiter] = None
+    # GET /admission and /metrics; must stay off wherever the port is publicly reachable
+    status_endpoints = False
+
     def _send(self, status_code: int, headers: Dict[str, str], body: str):
+        data = body.encode("utf-8")
         self.send_response(status_code)
         for k, v in headers.items():
             # Avoid duplicate header case normalization issues
             self.send_header(k, v)
+        self.send_header("Content-Length", str(len(data)))
         self.end_headers()
-        self.wfile.write(body.encode("utf-8"))
+        self.wfile.write(data)
+
+    def _send_stream(self, status_code: int, headers: Dict[str, str], chunks):
+        # Each NDJSON line goes out as its own chunk so the first records arrive immediately
+        self.send_response(status_code)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                self.wfile.write(b"%X\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
 
     def do_OPTIONS(self):  # CORS preflight passthrough
         path = self.path.strip("/")
@@ -53,6 +238,29 @@ class Handler(BaseHTTPRequestHandler):
         resp = handler(event, None)
         self._send(resp.get("statusCode", 200), resp.get("headers", {}), resp.get("body", ""))
 
+    def do_GET(self):
+        path = self.path.strip("/")
+        if not self.status_endpoints:
+            self.send_error(404, "Not Found")
+            return
+        if path == "metrics":
+            self._send(200, {"Content-Type": "text/plain; version=0.0.4"}, REGISTRY.render_prometheus())
+            return
+        if path != "admission":
+            self.send_error(404, "Not Found")
+            return
+        stats = {
+            "admission": self.admission.stats() if self.admission else None,
+            "rateLimit": self.limiter.stats() if self.limiter else None,
+        }
+        self._send(200, {"Content-Type": "application/json"}, json.dumps(stats))
+
+    def _reject(self, status_code: int, code: str, message: str, retry_after: int):
+        resp = error(status_code, code, message)
+        headers = dict(resp["headers"])
+        headers["Retry-After"] = str(retry_after)
+        self._send(status_code, headers, resp["body"])
+
     def do_POST(self):
         path = self.path.strip("/")
         if path not in TOOLS:
@@ -65,13 +273,46 @@ class Handler(BaseHTTPRequestHandler):
             "headers": self._collect_headers(),
             "body": raw,
         }
-        handler = load_handler(TOOLS[path])
+
+        started = time.perf_counter()
+        if self.limiter is not None:
+            allowed, retry_after = self.limiter.allow(_verified_client(event["headers"], raw))
+            if not allowed:
+                ADMISSION_REJECTIONS.inc(("rate_limited",))
+                self._reject(429, "RATE_LIMITED", "Too many requests for this client", retry_after)
+                record_tool(path, 429, time.perf_counter() - started)
+                return
+        if self.admission is not None:
+            reason = self.admission.acquire()
+            if reason is not None:
+                ADMISSION_REJECTIONS.inc((reason,))
+                self._reject(503, "OVERLOADED", f"Server saturated ({reason})", self.admission.retry_after_s())
+                record_tool(path, 503, time.perf_counter() - started)
+                return
         try:
-            resp = handler(event, None)
-        except Exception as e:
-            self.send_error(500, f"Handler error: {type(e).__name__}")
-            return
-        self._send(resp.get("statusCode", 200), resp.get("headers", {}), resp.get("body", ""))
+            self._dispatch(path, event)
+        finally:
+            if self.admission is not None:
+                self.admission.release()
+
+    def _dispatch(self, path: str, event: Dict[str, Any]):
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            handler = load_handler(TOOLS[path])
+            try:
+                resp = handler(event, None)
+            except Exception as e:
+                self.send_error(500, f"Handler error: {type(e).__name__}")
+                return
+            status_code = int(resp.get("statusCode", 200))
+            if resp.get("stream") is not None:
+                # Latency covers the whole stream, since batch work runs as it is consumed
+                self._send_stream(status_code, resp.get("headers", {}), resp["stream"])
+                return
+            self._send(status_code, resp.get("headers", {}), resp.get("body", ""))
+        finally:
+            record_tool(path, status_code, time.perf_counter() - started)
 
     def _collect_headers(self) -> Dict[str, str]:
         headers: Dict[str, str] = {}
@@ -84,17 +325,80 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--host", default="127.0.0.1")
     parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--max-concurrency", type=int, default=int(os.environ.get("DEV_MAX_CONCURRENCY", "8")))
+    parser.add_argument("--max-queue", type=int, default=int(os.environ.get("DEV_MAX_QUEUE", "32")))
+    parser.add_argument("--queue-timeout-ms", type=int, default=int(os.environ.get("DEV_QUEUE_TIMEOUT_MS", "2000")))
+    parser.add_argument("--rate", type=float, default=float(os.environ.get("DEV_CLIENT_RATE", "20")))
+    parser.add_argument("--burst", type=float, default=float(os.environ.get("DEV_CLIENT_BURST", "40")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("DEV_WORKERS", "1")))
+    parser.add_argument("--metrics-dir", default=os.environ.get("METRICS_DIR"))
+    parser.add_argument(
+        "--status-endpoints",
+        action="store_true",
+        default=os.environ.get("DEV_STATUS_ENDPOINTS", "").lower() in ("1", "true", "yes"),
+        help="Serve unauthenticated GET /admission and /metrics (local use only)",
+    )
     args = parser.parse_args()
-    server = HTTPServer((args.host, args.port), Handler)
+
+    if args.workers > 1:
+        metrics_dir = args.metrics_dir or tempfile.mkdtemp(prefix="cs-copilot-metrics-")
+        os.makedirs(metrics_dir, exist_ok=True)
+        # Snapshots from a previous run would otherwise be summed into this one
+        for stale in glob.glob(os.path.join(metrics_dir, "metrics-*.json")):
+            os.remove(stale)
+        REGISTRY.set_multiprocess_dir(metrics_dir)
+
+    Handler.status_endpoints = args.status_endpoints
+    Handler.admission = AdmissionController(args.max_concurrency, args.max_queue, args.queue_timeout_ms / 1000.0)
+    Handler.limiter = ClientRateLimiter(args.rate, args.burst) if args.rate > 0 else None
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
     print(f"Dev server listening on http://{args.host}:{args.port}")
     try:
-        server.serve_forever()
+        if args.workers > 1:
+            _serve_workers(server, args.workers)
+        else:
+            server.serve_forever()
     except KeyboardInterrupt:
         pass
     finally:
         server.server_close()
 
 
+def _serve_workers(server: ThreadingHTTPServer, workers: int) -> None:
+    """Fork workers that all accept on the already-bound listening socket."""
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                REGISTRY.start_flusher()
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            except Exception:
+                code = 1
+            finally:
+                try:
+                    REGISTRY.flush()
+                except OSError:
+                    pass
+                os._exit(code)
+        pids.append(pid)
+    print(f"Started {workers} workers: {pids}")
+    try:
+        for pid in pids:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        raise
+
+
 if __name__ == "__main__":
     main()
 
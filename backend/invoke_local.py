@@ -13,6 +13,9 @@ from tools.get_contract_info.handler import handler as get_contract_info_handler
 from tools.calculate_health.handler import handler as calculate_health_handler  # noqa: E402
 from tools.generate_email.handler import handler as generate_email_handler  # noqa: E402
 from tools.generate_qbr_outline.handler import handler as generate_qbr_outline_handler  # noqa: E402
+from tools.ingest_events.handler import handler as ingest_events_handler  # noqa: E402
+from tools.get_upcoming_renewals.handler import handler as get_upcoming_renewals_handler  # noqa: E402
+from tools.rank_at_risk_accounts.handler import handler as rank_at_risk_accounts_handler  # noqa: E402
 
 
 TOOLS = {
@@ -22,6 +25,9 @@ TOOLS = {
     "calculate_health": calculate_health_handler,
     "generate_email": generate_email_handler,
     "generate_qbr_outline": generate_qbr_outline_handler,
+    "ingest_events": ingest_events_handler,
+    "get_upcoming_renewals": get_upcoming_renewals_handler,
+    "rank_at_risk_accounts": rank_at_risk_accounts_handler,
 }
 
 
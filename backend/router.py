@@ -0,0 +1,98 @@
+"""
+Single-function entry point that dispatches to every tool handler in one
+warm process (see the Router resource in infra/sam-template.yaml).
+
+Tools share module-level state (cached HMAC secret, DATABASE_URL, trend and
+health-config caches) instead of each function warming its own copy. With
+DB_REUSE_CONNECTIONS (set on Router) the process also keeps its
+primary/replica connections open across invocations, so one warm router
+holds a handful of Neon connections instead of opening one per query. The
+tool is taken from the `{tool}` path parameter, the last path segment, or
+an X-Tool header. Per-tool metrics are logged in CloudWatch Embedded Metric
+Format, so they stay separate even though one function serves every tool.
+"""
+import json
+import time
+from typing import Any, Dict, Optional
+
+from _shared.responses import error
+
+# Import handlers statically to avoid dynamic import patterns flagged by linters/scanners.
+from tools.get_customer_usage.handler import handler as get_customer_usage_handler  # noqa: E402
+from tools.get_recent_tickets.handler import handler as get_recent_tickets_handler  # noqa: E402
+from tools.get_contract_info.handler import handler as get_contract_info_handler  # noqa: E402
+from tools.calculate_health.handler import handler as calculate_health_handler  # noqa: E402
+from tools.generate_email.handler import handler as generate_email_handler  # noqa: E402
+from tools.generate_qbr_outline.handler import handler as generate_qbr_outline_handler  # noqa: E402
+from tools.ingest_events.handler import handler as ingest_events_handler  # noqa: E402
+from tools.get_upcoming_renewals.handler import handler as get_upcoming_renewals_handler  # noqa: E402
+from tools.rank_at_risk_accounts.handler import handler as rank_at_risk_accounts_handler  # noqa: E402
+
+
+TOOLS = {
+    "get_customer_usage": get_customer_usage_handler,
+    "get_recent_tickets": get_recent_tickets_handler,
+    "get_contract_info": get_contract_info_handler,
+    "calculate_health": calculate_health_handler,
+    "generate_email": generate_email_handler,
+    "generate_qbr_outline": generate_qbr_outline_handler,
+    "ingest_events": ingest_events_handler,
+    "get_upcoming_renewals": get_upcoming_renewals_handler,
+    "rank_at_risk_accounts": rank_at_risk_accounts_handler,
+}
+
+METRICS_NAMESPACE = "CsCopilot/Tools"
+
+
+def resolve_tool(event: Dict[str, Any]) -> Optional[str]:
+    tool = (event.get("pathParameters") or {}).get("tool")
+    if not tool:
+        path = event.get("path") or event.get("rawPath") or ""
+        tool = path.rstrip("/").rsplit("/", 1)[-1]
+    if not tool:
+        headers = event.get("headers") or {}
+        tool = {k.lower(): v for k, v in headers.items()}.get("x-tool")
+    return tool or None
+
+
+def _emit_metrics(tool: str, status_code: int, duration_ms: float, cold: bool) -> None:
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [["Tool"]],
+                "Metrics": [
+                    {"Name": "Duration", "Unit": "Milliseconds"},
+                    {"Name": "Errors", "Unit": "Count"},
+                    {"Name": "ColdStarts", "Unit": "Count"},
+                ],
+            }],
+        },
+        "Tool": tool,
+        "Duration": round(duration_ms, 3),
+        "Errors": 1 if status_code >= 500 else 0,
+        "ColdStarts": 1 if cold else 0,
+        "StatusCode": status_code,
+    }))
+
+
+_COLD = True
+
+
+def handler(event, context):
+    global _COLD
+    tool = resolve_tool(event)
+    fn = TOOLS.get(tool or "")
+    if fn is None:
+        return error(404, "NOT_FOUND", f"Unknown tool: {tool}")
+    cold, _COLD = _COLD, False
+
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        resp = fn(event, context)
+        status_code = int(resp.get("statusCode", 200))
+        return resp
+    finally:
+        _emit_metrics(tool, status_code, (time.perf_counter() - started) * 1000.0, cold)
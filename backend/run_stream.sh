@@ -0,0 +1,6 @@
+#!/bin/sh
+# Entry point for the optional StreamingFunction (infra/sam-template.yaml).
+# The Lambda Web Adapter proxies Function URL requests to dev_server, which
+# writes chunked NDJSON for batch modes; the adapter streams it back as-is.
+export PYTHONPATH="/opt/python:${LAMBDA_TASK_ROOT:-.}:${PYTHONPATH}"
+exec python3 dev_server.py --host 127.0.0.1 --port "${PORT:-8080}"
@@ -1,46 +1,13 @@
 import json
-from datetime import datetime, timezone
 
 from _shared.hmac_auth import require_hmac
 from _shared.models import parse_envelope
 from _shared.responses import ok, error, preflight
+from _shared.trend import resolve_trend
+from _shared.health import days_until_renewal, load_health_config, risk_level, score_health
 from _shared.db import get_usage, get_tickets, get_contract
 
 
-def _score_from_usage(trend: str) -> int:
-    if trend == "up":
-        return 100
-    if trend == "down":
-        return 0
-    return 50
-
-
-def _score_from_tickets(open_tickets: int) -> int:
-    if open_tickets <= 0:
-        return 100
-    if open_tickets <= 2:
-        return 80
-    if open_tickets <= 5:
-        return 50
-    return 20
-
-
-def _score_from_renewal(days_until: int) -> int:
-    if days_until > 180:
-        return 100
-    if days_until >= 60:
-        return 70
-    return 30
-
-
-def _risk_level(score: int) -> str:
-    if score >= 75:
-        return "low"
-    if score >= 50:
-        return "medium"
-    return "high"
-
-
 def _handle(event):
     try:
         if event.get("httpMethod") == "OPTIONS":
@@ -54,44 +21,18 @@ def _handle(event):
         tickets = get_tickets(owner, customer_id)
         contract = get_contract(owner, customer_id)
 
-        trend = usage.get("trend", "flat")
+        trend = resolve_trend(usage)
         open_tickets = int(tickets.get("openTickets", 0))
-        renewal_date = contract.get("renewalDate")
-        days_until = 180
-        if isinstance(renewal_date, str) and renewal_date:
-            # Parse ISO8601, tolerate trailing 'Z'
-            rd = renewal_date.replace("Z", "+00:00")
-            try:
-                dt = datetime.fromisoformat(rd)
-                now = datetime.now(timezone.utc)
-                days_until = max(0, (dt - now).days)
-            except Exception:
-                days_until = 180
-
-        usage_component = _score_from_usage(trend) * 0.45
-        ticket_component = _score_from_tickets(open_tickets) * 0.35
-        renewal_component = _score_from_renewal(days_until) * 0.20
-        score = int(round(usage_component + ticket_component + renewal_component))
+        days_until = days_until_renewal(contract.get("renewalDate"))
 
-        signals = []
-        signals.append("usage_up" if trend == "up" else ("usage_down" if trend == "down" else "usage_flat"))
-        if open_tickets == 0:
-            signals.append("no_tickets")
-        elif open_tickets <= 2:
-            signals.append("few_tickets")
-        else:
-            signals.append("many_tickets")
-        if days_until < 60:
-            signals.append("renewal_near")
-        elif days_until > 180:
-            signals.append("renewal_far")
+        score, risk, signals = score_health(trend, open_tickets, days_until)
 
-        payload = {"score": score, "riskLevel": _risk_level(score), "signals": signals}
+        payload = {"score": score, "riskLevel": risk, "signals": signals}
         return ok(payload)
 
     except FileNotFoundError:
         # Gracefully return a neutral score when any source data is missing
-        payload = {"score": 60, "riskLevel": _risk_level(60), "signals": ["usage_flat"]}
+        payload = {"score": 60, "riskLevel": risk_level(60, load_health_config()), "signals": ["usage_flat"]}
         return ok(payload)
     except ValueError as ve:
         msg = str(ve)
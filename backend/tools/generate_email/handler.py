@@ -1,54 +1,222 @@
 import json
 from datetime import datetime
+from string import Formatter
+from typing import Any, Dict, Iterator, Tuple
 
 from _shared.hmac_auth import require_hmac
-from _shared.models import parse_envelope
-from _shared.responses import ok, error, preflight
-from _shared.db import get_usage, get_tickets, get_contract
+from _shared.models import parse_envelope, parse_batch
+from _shared.responses import ok, error, preflight, ndjson, buffered
+from _shared.trend import resolve_trend
+from _shared.db import get_usage, get_tickets, get_contract, iter_owner_summaries
 
+DEFAULT_TEMPLATE = "renewal"
+DEFAULT_LOCALE = "en"
 
-def _compose_subject(customer_id: str) -> str:
-    return f"Renewal Alignment with {customer_id.replace('-', ' ').title()}"
+_TEMPLATES = {
+    ("renewal", "en"): {
+        "subject": "Renewal Alignment with {company}",
+        "body": (
+            "Hi team,\n\n"
+            "Ahead of your renewal on {when}, I wanted to share a quick status and align on next steps.\n\n"
+            "- {trend_txt}\n"
+            "- {tickets_txt}\n\n"
+            "Proposed next steps:\n"
+            "1) Confirm priority outcomes for the next quarter\n"
+            "2) Schedule a renewal prep call\n"
+            "3) Review enablement resources to support broader adoption\n\n"
+            "Would early next week work for a 30-minute call?\n\n"
+            "Best,\nCustomer Success Copilot"
+        ),
+    },
+    ("renewal", "es"): {
+        "subject": "Preparación de la renovación con {company}",
+        "body": (
+            "Hola equipo,\n\n"
+            "Antes de su renovación el {when}, quería compartir un breve estado y acordar los próximos pasos.\n\n"
+            "- {trend_txt}\n"
+            "- {tickets_txt}\n\n"
+            "Próximos pasos propuestos:\n"
+            "1) Confirmar los resultados prioritarios para el próximo trimestre\n"
+            "2) Agendar una llamada de preparación de la renovación\n"
+            "3) Revisar recursos de capacitación para ampliar la adopción\n\n"
+            "¿Les viene bien una llamada de 30 minutos a principios de la próxima semana?\n\n"
+            "Saludos,\nCustomer Success Copilot"
+        ),
+    },
+    ("check_in", "en"): {
+        "subject": "Checking in with {company}",
+        "body": (
+            "Hi team,\n\n"
+            "A quick check-in on how things are going. Your renewal is coming up on {when}.\n\n"
+            "- {trend_txt}\n"
+            "- {tickets_txt}\n\n"
+            "Is there anything we can help with before then?\n\n"
+            "Best,\nCustomer Success Copilot"
+        ),
+    },
+    ("check_in", "es"): {
+        "subject": "Seguimiento con {company}",
+        "body": (
+            "Hola equipo,\n\n"
+            "Un breve seguimiento para ver cómo va todo. Su renovación es el {when}.\n\n"
+            "- {trend_txt}\n"
+            "- {tickets_txt}\n\n"
+            "¿Hay algo en lo que podamos ayudar antes de esa fecha?\n\n"
+            "Saludos,\nCustomer Success Copilot"
+        ),
+    },
+}
 
+_PHRASES = {
+    "en": {
+        "trend": {
+            "up": "Your adoption trend looks strong in the past period.",
+            "down": "We noticed a dip in recent adoption; let’s review together.",
+            "flat": "Adoption has been steady; we’ll review opportunities to increase value.",
+        },
+        "trend_default": "Adoption looks steady.",
+        "no_tickets": "No open support tickets right now.",
+        "tickets": "{n} open support ticket(s) at the moment.",
+    },
+    "es": {
+        "trend": {
+            "up": "Su tendencia de adopción se ve sólida en el último período.",
+            "down": "Notamos una baja en la adopción reciente; revisémosla juntos.",
+            "flat": "La adopción se ha mantenido estable; revisaremos oportunidades para aumentar el valor.",
+        },
+        "trend_default": "La adopción se ve estable.",
+        "no_tickets": "No hay tickets de soporte abiertos en este momento.",
+        "tickets": "{n} ticket(s) de soporte abierto(s) en este momento.",
+    },
+}
 
-def _compose_body(customer_id: str, trend: str, open_tickets: int, renewal_date: str) -> str:
+_MONTHS_ES = ("ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sep", "oct", "nov", "dic")
+
+# (template, locale) -> compiled subject/body/tickets parts; filled on first use
+_COMPILED: Dict[Tuple[str, str], Dict[str, tuple]] = {}
+
+
+def _compile_text(text: str) -> tuple:
+    """Split a {field} template into (literal, field) pairs once, so rendering is a join."""
+    return tuple((literal, field) for literal, field, _, _ in Formatter().parse(text))
+
+
+def _render_text(parts: tuple, values: Dict[str, Any]) -> str:
+    out = []
+    for literal, field in parts:
+        out.append(literal)
+        if field is not None:
+            out.append(str(values[field]))
+    return "".join(out)
+
+
+def _compiled(template: str, locale: str) -> Dict[str, tuple]:
+    key = (template, locale)
+    c = _COMPILED.get(key)
+    if c is None:
+        t = _TEMPLATES[key]
+        c = {
+            "subject": _compile_text(t["subject"]),
+            "body": _compile_text(t["body"]),
+            "tickets": _compile_text(_PHRASES[locale]["tickets"]),
+        }
+        _COMPILED[key] = c
+    return c
+
+
+def _template_choice(params: Dict[str, Any]) -> Tuple[str, str]:
+    template = params.get("template") or DEFAULT_TEMPLATE
+    locale = params.get("locale") or DEFAULT_LOCALE
+    if (template, locale) not in _TEMPLATES:
+        raise ValueError(f"INVALID_INPUT: unknown template/locale {template}/{locale}")
+    return template, locale
+
+
+def _format_date(renewal_date: str, locale: str) -> str:
     rd = renewal_date.replace("Z", "+00:00") if isinstance(renewal_date, str) else renewal_date
     dt = datetime.fromisoformat(rd)
-    when = dt.strftime("%b %d, %Y")
-    trend_txt = {
-        "up": "Your adoption trend looks strong in the past period.",
-        "down": "We noticed a dip in recent adoption; let’s review together.",
-        "flat": "Adoption has been steady; we’ll review opportunities to increase value.",
-    }.get(trend, "Adoption looks steady.")
-
-    tickets_txt = (
-        "No open support tickets right now."
-        if open_tickets == 0
-        else (f"{open_tickets} open support ticket(s) at the moment.")
-    )
-
-    return (
-        f"Hi team,\n\n"
-        f"Ahead of your renewal on {when}, I wanted to share a quick status and align on next steps.\n\n"
-        f"- {trend_txt}\n"
-        f"- {tickets_txt}\n\n"
-        f"Proposed next steps:\n"
-        f"1) Confirm priority outcomes for the next quarter\n"
-        f"2) Schedule a renewal prep call\n"
-        f"3) Review enablement resources to support broader adoption\n\n"
-        f"Would early next week work for a 30-minute call?\n\n"
-        f"Best,\nCustomer Success Copilot"
-    )
-
-
-def _handle(event):
+    if locale == "es":
+        return f"{dt.day:02d} {_MONTHS_ES[dt.month - 1]} {dt.year}"
+    return dt.strftime("%b %d, %Y")
+
+
+def _compose(
+    customer_id: str,
+    trend: str,
+    open_tickets: int,
+    renewal_date: str,
+    template: str = DEFAULT_TEMPLATE,
+    locale: str = DEFAULT_LOCALE,
+) -> Dict[str, str]:
+    compiled = _compiled(template, locale)
+    phrases = _PHRASES[locale]
+    values = {
+        "company": customer_id.replace("-", " ").title(),
+        "when": _format_date(renewal_date, locale),
+        "trend_txt": phrases["trend"].get(trend, phrases["trend_default"]),
+        "tickets_txt": (
+            phrases["no_tickets"]
+            if open_tickets == 0
+            else _render_text(compiled["tickets"], {"n": open_tickets})
+        ),
+    }
+    return {
+        "subject": _render_text(compiled["subject"], values),
+        "body": _render_text(compiled["body"], values),
+    }
+
+
+def _iter_batch(owner: str, batch: Dict[str, Any], template: str, locale: str) -> Iterator[Dict[str, Any]]:
+    """One NDJSON record per customer; rows are loaded in a single set-based query."""
+    wanted = batch["customerIds"]
+    seen = set()
+    try:
+        rows = iter_owner_summaries(
+            owner,
+            company_ids=wanted,
+            renewal_within_days=batch["renewalWithinDays"],
+        )
+        for row in rows:
+            cid = row["customerId"]
+            seen.add(cid)
+            if not row["renewalDate"]:
+                yield {"customerId": cid, "ok": False, "data": None,
+                       "error": {"code": "MISSING_DATA", "message": "Missing renewalDate"}}
+                continue
+            try:
+                email = _compose(cid, resolve_trend(row), row["openTickets"], row["renewalDate"], template, locale)
+            except ValueError:
+                yield {"customerId": cid, "ok": False, "data": None,
+                       "error": {"code": "INVALID_DATA", "message": "Unparseable renewalDate"}}
+                continue
+            yield {"customerId": cid, "ok": True, "data": email, "error": None}
+    except Exception as e:
+        print(json.dumps({"type":"TOOL_LOG","tool":"generate_email","error":"BATCH_EXCEPTION","ex":type(e).__name__}))
+        yield {"customerId": None, "ok": False, "data": None,
+               "error": {"code": "TOOL_FAILURE", "message": type(e).__name__}}
+        return
+    for cid in wanted or ():
+        if cid not in seen:
+            yield {"customerId": cid, "ok": False, "data": None,
+                   "error": {"code": "MISSING_DATA", "message": "Unknown customer"}}
+
+
+def _handle(event, streaming: bool):
     try:
         if event.get("httpMethod") == "OPTIONS":
             return preflight()
 
         require_hmac(event)
-        customer_id, params = parse_envelope(event.get("body") or "")
+        customer_id, params = parse_envelope(event.get("body") or "", require_customer=False)
         owner = (params or {}).get("ownerUserId") or "public"
+        template, locale = _template_choice(params or {})
+
+        if "batch" in (params or {}):
+            batch = parse_batch(params, streaming)
+            print(json.dumps({"type":"TOOL_LOG","tool":"generate_email","owner":owner,"batch":True,"template":template,"locale":locale}))
+            return ndjson(_iter_batch(owner, batch, template, locale))
+        if not customer_id:
+            raise ValueError("INVALID_INPUT: customerId")
         print(f"[DEBUG] generate_email: customer_id={customer_id}, owner={owner}, params={params}")
 
         try:
@@ -64,16 +232,13 @@ def _handle(event):
             except Exception:
                 return error(404, "MISSING_DATA", "Missing data for email composition")
 
-        trend = usage.get("trend", "flat")
+        trend = resolve_trend(usage)
         open_tickets = int(tickets.get("openTickets", 0))
         renewal_date = contract.get("renewalDate")
         if not renewal_date:
             return error(404, "MISSING_DATA", "Missing renewalDate")
 
-        payload = {
-            "subject": _compose_subject(customer_id),
-            "body": _compose_body(customer_id, trend, open_tickets, renewal_date),
-        }
+        payload = _compose(customer_id, trend, open_tickets, renewal_date, template, locale)
         return ok(payload)
 
     except ValueError as ve:
@@ -85,7 +250,12 @@ def _handle(event):
 
 
 def handler(event, context):
-    return _handle(event)
+    return buffered(_handle(event, streaming=False))
+
+
+def stream_handler(event, context):
+    """Like handler, but batch responses keep their lazy `stream` and every batch mode is allowed."""
+    return _handle(event, streaming=True)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,15 @@
 import json
+from itertools import islice
+from typing import Any, Dict, Iterator
+
 from _shared.hmac_auth import require_hmac
-from _shared.models import parse_envelope
-from _shared.responses import ok, error, preflight
-from _shared.db import get_usage, get_tickets
+from _shared.models import parse_envelope, parse_batch
+from _shared.responses import ok, error, preflight, ndjson, buffered
+from _shared.trend import analyze_many, resolve_trend
+from _shared.db import get_usage, get_tickets, iter_owner_summaries
+
+
+BATCH_CHUNK = 200
 
 
 def _sections(trend: str, open_tickets: int) -> list:
@@ -20,15 +27,59 @@ def _sections(trend: str, open_tickets: int) -> list:
     return base
 
 
-def _handle(event):
+def _iter_book(owner: str, batch: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """One NDJSON record per customer, streamed from a server-side cursor.
+
+    Rows are scored in chunks of BATCH_CHUNK so trends are computed in bulk
+    while only one chunk is held in memory.
+    """
+    wanted = batch["customerIds"]
+    seen = set()
+    try:
+        rows = iter_owner_summaries(
+            owner,
+            company_ids=wanted,
+            renewal_within_days=batch["renewalWithinDays"],
+            batch_size=BATCH_CHUNK,
+        )
+        while True:
+            chunk = list(islice(rows, BATCH_CHUNK))
+            if not chunk:
+                break
+            stats = analyze_many(r["sparkline"] for r in chunk)
+            for row, st in zip(chunk, stats):
+                cid = row["customerId"]
+                if wanted is not None:
+                    seen.add(cid)
+                trend = st["trend"] if st else row["trend"]
+                yield {"customerId": cid, "ok": True, "data": {"sections": _sections(trend, row["openTickets"])}, "error": None}
+    except Exception as e:
+        print(json.dumps({"type":"TOOL_LOG","tool":"generate_qbr_outline","error":"BATCH_EXCEPTION","ex":type(e).__name__}))
+        yield {"customerId": None, "ok": False, "data": None,
+               "error": {"code": "TOOL_FAILURE", "message": type(e).__name__}}
+        return
+    for cid in wanted or ():
+        if cid not in seen:
+            yield {"customerId": cid, "ok": False, "data": None,
+                   "error": {"code": "MISSING_DATA", "message": "Unknown customer"}}
+
+
+def _handle(event, streaming: bool):
     try:
         if event.get("httpMethod") == "OPTIONS":
             return preflight()
 
         require_hmac(event)
-        customer_id, params = parse_envelope(event.get("body") or "")
+        customer_id, params = parse_envelope(event.get("body") or "", require_customer=False)
         owner = (params or {}).get("ownerUserId") or "public"
 
+        if "batch" in (params or {}):
+            batch = parse_batch(params, streaming)
+            print(json.dumps({"type":"TOOL_LOG","tool":"generate_qbr_outline","owner":owner,"batch":True}))
+            return ndjson(_iter_book(owner, batch))
+        if not customer_id:
+            raise ValueError("INVALID_INPUT: customerId")
+
         try:
             usage = get_usage(owner, customer_id)
             tickets = get_tickets(owner, customer_id)
@@ -42,7 +93,7 @@ def _handle(event):
                 usage = {"trend": "flat", "missingData": True}
                 tickets = {"openTickets": 0, "missingData": True}
 
-        trend = usage.get("trend", "flat")
+        trend = resolve_trend(usage)
         open_tickets = int(tickets.get("openTickets", 0))
 
         payload = {"sections": _sections(trend, open_tickets)}
@@ -57,7 +108,12 @@ def _handle(event):
 
 
 def handler(event, context):
-    return _handle(event)
+    return buffered(_handle(event, streaming=False))
+
+
+def stream_handler(event, context):
+    """Like handler, but batch responses keep their lazy `stream` and every batch mode is allowed."""
+    return _handle(event, streaming=True)
 
 
 if __name__ == "__main__":
@@ -71,4 +127,3 @@ if __name__ == "__main__":
     sig = sign(os.environ["HMAC_SECRET"], ts, "local", body)
     event = {"body": body, "headers": {"X-Signature": sig, "X-Timestamp": ts, "X-Client": "local"}}
     print(handler(event, None))
-
@@ -0,0 +1,96 @@
+import base64
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from _shared.hmac_auth import require_hmac
+from _shared.models import parse_envelope
+from _shared.responses import ok, error, preflight
+from _shared.health import days_until_renewal
+from _shared.db import get_upcoming_renewals
+
+DEFAULT_WITHIN_DAYS = 90
+MAX_WITHIN_DAYS = 3650
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def _encode_cursor(renewal_date: str, customer_id: str) -> str:
+    raw = json.dumps({"d": renewal_date, "c": customer_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: Any) -> Optional[Tuple[str, str]]:
+    if cursor is None:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+        d, c = data["d"], data["c"]
+        if not isinstance(d, str) or not isinstance(c, str):
+            raise TypeError
+        return d, c
+    except Exception:
+        raise ValueError("INVALID_INPUT: params.cursor")
+
+
+def _int_param(params: Dict[str, Any], name: str, default: Optional[int], lo: int, hi: Optional[int]) -> Optional[int]:
+    value = params.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < lo or (hi is not None and value > hi):
+        raise ValueError(f"INVALID_INPUT: params.{name}")
+    return value
+
+
+def _handle(event):
+    try:
+        if event.get("httpMethod") == "OPTIONS":
+            return preflight()
+
+        require_hmac(event)
+        _, params = parse_envelope(event.get("body") or "", require_customer=False)
+        params = params or {}
+        owner = params.get("ownerUserId") or "public"
+
+        within_days = _int_param(params, "withinDays", DEFAULT_WITHIN_DAYS, 1, MAX_WITHIN_DAYS)
+        limit = _int_param(params, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+        min_arr = _int_param(params, "minArr", None, 0, None)
+        max_arr = _int_param(params, "maxArr", None, 0, None)
+        after = _decode_cursor(params.get("cursor"))
+
+        # One extra row tells us whether another page exists
+        rows = get_upcoming_renewals(owner, within_days, limit + 1, after, min_arr, max_arr)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(last["renewalDate"], last["customerId"])
+        for r in rows:
+            r["daysUntil"] = days_until_renewal(r["renewalDate"])
+
+        print(json.dumps({"type":"TOOL_LOG","tool":"get_upcoming_renewals","owner":owner,"count":len(rows),"hasMore":next_cursor is not None}))
+        return ok({"renewals": rows, "nextCursor": next_cursor})
+
+    except ValueError as ve:
+        msg = str(ve)
+        code = "INVALID_INPUT" if "INVALID_" in msg else "UNAUTHORIZED"
+        print(json.dumps({"type":"TOOL_LOG","tool":"get_upcoming_renewals","error":code}))
+        return error(400 if code == "INVALID_INPUT" else 401, code, msg)
+    except Exception as e:
+        print(json.dumps({"type":"TOOL_LOG","tool":"get_upcoming_renewals","error":"EXCEPTION","ex":type(e).__name__}))
+        return error(500, "TOOL_FAILURE", f"{type(e).__name__}")
+
+
+def handler(event, context):
+    return _handle(event)
+
+
+if __name__ == "__main__":
+    from _shared.hmac_auth import sign
+    import os, time
+
+    os.environ.setdefault("HMAC_SECRET", "dev-secret")
+    body = json.dumps({"params": {"withinDays": 180, "limit": 2}})
+    ts = str(int(time.time() * 1000))
+    sig = sign(os.environ["HMAC_SECRET"], ts, "local", body)
+    event = {"body": body, "headers": {"X-Signature": sig, "X-Timestamp": ts, "X-Client": "local"}}
+    print(handler(event, None))
@@ -0,0 +1,58 @@
+import json
+from _shared.hmac_auth import require_hmac
+from _shared.models import parse_envelope
+from _shared.responses import ok, error, preflight
+from _shared.events import fold_events
+from _shared.db import apply_event_deltas
+
+
+def _handle(event):
+    try:
+        if event.get("httpMethod") == "OPTIONS":
+            return preflight()
+
+        require_hmac(event)
+        customer_id, params = parse_envelope(event.get("body") or "")
+        owner = (params or {}).get("ownerUserId") or "public"
+        events = (params or {}).get("events")
+
+        deltas = fold_events(customer_id, events)
+        counts = apply_event_deltas(owner, deltas)
+
+        payload = {"applied": len(events), "customers": counts["customers"], "statements": counts["statements"]}
+        print(json.dumps({"type":"TOOL_LOG","tool":"ingest_events","owner":owner,"customerId":customer_id,**payload}))
+        return ok(payload)
+
+    except ValueError as ve:
+        msg = str(ve)
+        code = "INVALID_INPUT" if "INVALID_" in msg else "UNAUTHORIZED"
+        print(json.dumps({"type":"TOOL_LOG","tool":"ingest_events","error":code}))
+        return error(400 if code == "INVALID_INPUT" else 401, code, msg)
+    except Exception as e:
+        print(json.dumps({"type":"TOOL_LOG","tool":"ingest_events","error":"EXCEPTION","ex":type(e).__name__}))
+        return error(500, "TOOL_FAILURE", f"{type(e).__name__}")
+
+
+def handler(event, context):
+    return _handle(event)
+
+
+if __name__ == "__main__":
+    from _shared.hmac_auth import sign
+    import os, time
+
+    os.environ.setdefault("HMAC_SECRET", "dev-secret")
+    body = json.dumps({
+        "customerId": "acme-001",
+        "params": {
+            "events": [
+                {"type": "ticket_opened", "ticketId": "T-903", "severity": "high"},
+                {"type": "ticket_severity_changed", "ticketId": "T-901", "severity": "medium"},
+                {"type": "daily_active_users", "value": 91},
+            ]
+        },
+    })
+    ts = str(int(time.time() * 1000))
+    sig = sign(os.environ["HMAC_SECRET"], ts, "local", body)
+    event = {"body": body, "headers": {"X-Signature": sig, "X-Timestamp": ts, "X-Client": "local"}}
+    print(handler(event, None))
@@ -0,0 +1,120 @@
+import heapq
+import json
+from itertools import islice
+from typing import Any, Dict, List
+
+from _shared.hmac_auth import require_hmac
+from _shared.models import parse_envelope
+from _shared.responses import ok, error, preflight
+from _shared.trend import analyze_many
+from _shared.health import days_until_renewal, load_health_config, score_health
+from _shared.db import iter_owner_summaries
+
+DEFAULT_K = 10
+MAX_K = 500
+SCAN_CHUNK = 500
+RISK_LEVELS = ("low", "medium", "high")
+
+
+def _parse_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    k = params.get("k", DEFAULT_K)
+    if isinstance(k, bool) or not isinstance(k, int) or not 1 <= k <= MAX_K:
+        raise ValueError("INVALID_INPUT: params.k")
+    levels = params.get("riskLevels")
+    if levels is not None:
+        if not isinstance(levels, list) or not levels or any(lv not in RISK_LEVELS for lv in levels):
+            raise ValueError("INVALID_INPUT: params.riskLevels")
+        levels = set(levels)
+    within = params.get("renewalWithinDays")
+    if within is not None and (isinstance(within, bool) or not isinstance(within, int) or within <= 0):
+        raise ValueError("INVALID_INPUT: params.renewalWithinDays")
+    return {"k": k, "riskLevels": levels, "renewalWithinDays": within}
+
+
+def _top_k_at_risk(owner: str, opts: Dict[str, Any]) -> Dict[str, Any]:
+    """Scan the owner's book once, keeping only the K lowest-scoring accounts.
+
+    Rank key is (score asc, arr desc, scan order). The heap stores the negated
+    key, so its root is the healthiest kept account and is evicted first;
+    memory is O(K) plus one scan chunk.
+    """
+    cfg = load_health_config()
+    k = opts["k"]
+    levels = opts["riskLevels"]
+    heap: List[tuple] = []
+    scanned = matched = 0
+
+    rows = iter_owner_summaries(owner, renewal_within_days=opts["renewalWithinDays"], batch_size=SCAN_CHUNK)
+    while True:
+        chunk = list(islice(rows, SCAN_CHUNK))
+        if not chunk:
+            break
+        stats = analyze_many(r["sparkline"] for r in chunk)
+        for row, st in zip(chunk, stats):
+            scanned += 1
+            trend = st["trend"] if st else row["trend"]
+            score, risk, signals = score_health(trend, row["openTickets"], days_until_renewal(row["renewalDate"]), cfg)
+            if levels is not None and risk not in levels:
+                continue
+            matched += 1
+            entry = (-score, row["arr"], -scanned)
+            if len(heap) < k:
+                heapq.heappush(heap, (entry, row, trend, score, risk, signals))
+            elif entry > heap[0][0]:
+                heapq.heapreplace(heap, (entry, row, trend, score, risk, signals))
+
+    accounts = []
+    for _, row, trend, score, risk, signals in sorted(heap, key=lambda e: e[0], reverse=True):
+        accounts.append({
+            "customerId": row["customerId"],
+            "name": row["name"],
+            "score": score,
+            "riskLevel": risk,
+            "signals": signals,
+            "trend": trend,
+            "openTickets": row["openTickets"],
+            "renewalDate": row["renewalDate"],
+            "arr": row["arr"],
+        })
+    return {"accounts": accounts, "scanned": scanned, "matched": matched}
+
+
+def _handle(event):
+    try:
+        if event.get("httpMethod") == "OPTIONS":
+            return preflight()
+
+        require_hmac(event)
+        _, params = parse_envelope(event.get("body") or "", require_customer=False)
+        params = params or {}
+        owner = params.get("ownerUserId") or "public"
+        opts = _parse_params(params)
+
+        payload = _top_k_at_risk(owner, opts)
+        print(json.dumps({"type":"TOOL_LOG","tool":"rank_at_risk_accounts","owner":owner,"k":opts["k"],"scanned":payload["scanned"],"matched":payload["matched"]}))
+        return ok(payload)
+
+    except ValueError as ve:
+        msg = str(ve)
+        code = "INVALID_INPUT" if "INVALID_" in msg else "UNAUTHORIZED"
+        print(json.dumps({"type":"TOOL_LOG","tool":"rank_at_risk_accounts","error":code}))
+        return error(400 if code == "INVALID_INPUT" else 401, code, msg)
+    except Exception as e:
+        print(json.dumps({"type":"TOOL_LOG","tool":"rank_at_risk_accounts","error":"EXCEPTION","ex":type(e).__name__}))
+        return error(500, "TOOL_FAILURE", f"{type(e).__name__}")
+
+
+def handler(event, context):
+    return _handle(event)
+
+
+if __name__ == "__main__":
+    from _shared.hmac_auth import sign
+    import os, time
+
+    os.environ.setdefault("HMAC_SECRET", "dev-secret")
+    body = json.dumps({"params": {"k": 5, "riskLevels": ["high", "medium"]}})
+    ts = str(int(time.time() * 1000))
+    sig = sign(os.environ["HMAC_SECRET"], ts, "local", body)
+    event = {"body": body, "headers": {"X-Signature": sig, "X-Timestamp": ts, "X-Client": "local"}}
+    print(handler(event, None))
@@ -625,7 +625,8 @@ export async function upsertUsageAction(input: {
     })
     .onConflictDoUpdate({
       target: [usageSummaries.ownerUserId, usageSummaries.companyExternalId],
-      set: { sparkline: validated.sparkline, avgDailyUsers: avg, trend },
+      // Clear the packed copy so a stale one is never read; the DB trigger repacks it when installed
+      set: { sparkline: validated.sparkline, sparklinePacked: null, avgDailyUsers: avg, trend },
     });
   revalidatePath("/dashboard");
 }
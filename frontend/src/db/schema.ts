@@ -10,6 +10,7 @@ import {
   uniqueIndex,
   primaryKey,
   boolean,
+  customType,
 } from "drizzle-orm/pg-core";
 import { relations } from "drizzle-orm";
 
@@ -93,12 +94,27 @@ export const contracts = pgTable(
   (t) => ({
     contractsOwnerIdx: index("contracts_owner_idx").on(t.ownerUserId),
     contractsCompanyIdx: index("contracts_company_idx").on(t.companyExternalId),
+    // Range scans for get_upcoming_renewals: owner equality + (renewal_date, company) keyset;
+    // arr is trailing so ARR filters can be answered from the index alone
+    contractsOwnerRenewalIdx: index("contracts_owner_renewal_idx").on(
+      t.ownerUserId,
+      t.renewalDate,
+      t.companyExternalId,
+      t.arr
+    ),
     // Enforce one row per (owner, company)
     contractsPk: primaryKey({ columns: [t.ownerUserId, t.companyExternalId] }),
     // DB-level FK omitted; enforced via relations
   })
 );
 
+// Raw bytes column; drizzle-orm's pg-core has no built-in bytea type
+const bytea = customType<{ data: Buffer; driverData: Buffer }>({
+  dataType() {
+    return "bytea";
+  },
+});
+
 export const usageSummaries = pgTable(
   "usage_summaries",
   {
@@ -107,6 +123,10 @@ export const usageSummaries = pgTable(
     trend: text("trend").notNull(), // up | down | flat
     avgDailyUsers: integer("avg_daily_users").notNull(),
     sparkline: jsonb("sparkline").$type<number[]>().notNull(),
+    // Same series rounded to big-endian int32s (Postgres int4send, clamped to int32 range). backend/backfill_sparklines.py
+    // installs a trigger that recomputes it on every sparkline write; read by the
+    // backend when SPARKLINE_PACKED=1 (null -> falls back to the jsonb column)
+    sparklinePacked: bytea("sparkline_packed"),
   },
   (t) => ({
     usageOwnerIdx: index("usage_owner_idx").on(t.ownerUserId),